@@ -11,10 +11,11 @@ class Config:
         'sqlite:///./alex.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_size': 10,
+        'pool_size': 20,
         'pool_recycle': 3600,
         'pool_pre_ping': True,
-        'max_overflow': 20
+        'max_overflow': 30,
+        'pool_timeout': 10  # Fail fast instead of queueing for 30s on an exhausted pool
     }
     
     # JWT Configuration
@@ -47,6 +48,15 @@ class Config:
     # OpenAI Configuration (when AI_PROVIDER='openai')
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
     
+    # File serving - let the reverse proxy stream stored files. Set
+    # X_ACCEL_REDIRECT_PREFIX to an nginx internal location aliased to the
+    # upload folder, or USE_X_SENDFILE=1 behind Apache mod_xsendfile
+    X_ACCEL_REDIRECT_PREFIX = os.environ.get('X_ACCEL_REDIRECT_PREFIX')
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE') == '1'
+    
+    # Raise on unexpected lazy loads in eager-loaded query paths
+    STRICT_LOADING = os.environ.get('STRICT_LOADING') == '1'
+    
     # Logging
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
     LOG_FILE = os.environ.get('LOG_FILE', 'logs/app.log')
@@ -56,6 +66,7 @@ class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
     TESTING = False
+    STRICT_LOADING = True
 
 
 class ProductionConfig(Config):
@@ -76,7 +87,10 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # The base pool sizing options are rejected by SQLite's in-memory pool
+    SQLALCHEMY_ENGINE_OPTIONS = {}
     WTF_CSRF_ENABLED = False
+    STRICT_LOADING = True
 
 
 config = {
@@ -33,6 +33,7 @@ from src.routes.users import users_bp
 from src.routes.document_analysis import document_analysis_bp
 from src.routes.memory import memory_bp
 from src.utils.errors import register_error_handlers
+from src.utils.json_provider import init_json_provider
 from src.middleware.security import register_security_middleware
 
 
@@ -43,6 +44,9 @@ def create_app(config_name='default'):
     # Load configuration
     app.config.from_object(config[config_name])
     
+    # Serialize JSON with orjson when available
+    init_json_provider(app)
+    
     # Validate environment variables
     if config_name == 'production':
         validate_environment('production')
@@ -187,7 +191,7 @@ def seed_database():
     from datetime import datetime, timedelta
     
     # Check if already seeded
-    if User.query.count() > 0:
+    if db.session.query(User.query.exists()).scalar():
         return
     
     print("Seeding database...")
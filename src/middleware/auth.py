@@ -1,11 +1,14 @@
 """
 Authentication middleware using JWT
 """
+from datetime import timedelta
 from functools import wraps
 from flask import request, jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, create_access_token
 from flask_jwt_extended.exceptions import NoAuthorizationError, InvalidHeaderError
 
+from src.utils.errors import APIError
+
 
 def token_required(f):
     """
@@ -27,6 +30,9 @@ def token_required(f):
             return jsonify({'error': 'Missing authorization token'}), 401
         except InvalidHeaderError:
             return jsonify({'error': 'Invalid authorization header'}), 401
+        except APIError:
+            # Raised by the view itself - let the registered handler respond
+            raise
         except Exception as e:
             return jsonify({'error': f'Authentication failed: {str(e)}'}), 401
     return decorated
@@ -70,3 +76,22 @@ def get_current_user():
     except Exception:
         return None
 
+
+def create_user_access_token(user):
+    """
+    Create an access token for user carrying their current name as the
+    'name' claim, so routes can read it without a user lookup
+    """
+    return create_access_token(identity=str(user.id), additional_claims={'name': user.name})
+
+
+def set_access_cookie(response, access_token):
+    """Set the access token cookie (httpOnly, secure in production)"""
+    response.set_cookie(
+        'access_token',
+        value=access_token,
+        httponly=True,
+        secure=request.is_secure,
+        samesite='Lax',
+        max_age=timedelta(hours=1)
+    )
@@ -3,7 +3,7 @@ Chat Models for Group Chat and AI Assistant
 Implements task-based group chat and private AI assistant functionality
 """
 from datetime import datetime
-from ..models.models import db
+from ..models.models import db, utcnow
 
 
 class TaskChat(db.Model):
@@ -16,7 +16,7 @@ class TaskChat(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False, unique=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=utcnow(), server_default=utcnow(), onupdate=utcnow())
     is_active = db.Column(db.Boolean, default=True)
     
     # Relationships
@@ -30,16 +30,26 @@ class TaskChat(db.Model):
         db.Index('idx_task_chat_active', 'is_active'),
     )
     
-    def to_dict(self):
-        """Convert to dictionary"""
+    def to_dict(self, message_count=None, participant_count=None):
+        """
+        Convert to dictionary
+        
+        Counts already known to the caller can be passed in to skip the
+        COUNT queries.
+        """
+        if message_count is None:
+            message_count = self.messages.count()
+        if participant_count is None:
+            participant_count = self.participants.filter_by(is_active=True).count()
+        
         return {
             'id': self.id,
             'task_id': self.task_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'is_active': self.is_active,
-            'message_count': self.messages.count(),
-            'participant_count': self.participants.filter_by(is_active=True).count()
+            'message_count': message_count,
+            'participant_count': participant_count
         }
 
 
@@ -71,6 +81,13 @@ class ChatMessage(db.Model):
         db.Index('idx_chat_msg_user', 'user_id'),
         db.Index('idx_chat_msg_created', 'created_at'),
         db.Index('idx_chat_msg_type', 'message_type'),
+        # Message history lookups only ever read non-deleted messages, newest
+        # first by id
+        db.Index(
+            'idx_chat_msg_chat_id', 'chat_id', 'id',
+            postgresql_where=db.text('is_deleted = false'),
+            sqlite_where=db.text('is_deleted = 0')
+        ),
     )
     
     def to_dict(self, include_user=True):
@@ -121,6 +138,12 @@ class ChatParticipant(db.Model):
         db.UniqueConstraint('chat_id', 'user_id', name='uq_chat_participant'),
         db.Index('idx_chat_participant_chat', 'chat_id'),
         db.Index('idx_chat_participant_user', 'user_id'),
+        # Access checks only ever look up active participants
+        db.Index(
+            'idx_chat_participant_chat_user_active', 'chat_id', 'user_id',
+            postgresql_where=db.text('is_active = true'),
+            sqlite_where=db.text('is_active = 1')
+        ),
     )
     
     def to_dict(self, include_user=True):
@@ -2,18 +2,68 @@
 Database models for Alex Backend
 """
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
 db = SQLAlchemy()
 
 
+class utcnow(FunctionElement):
+    """
+    Current UTC time evaluated by the database, for use as a column
+    default/onupdate or assigned to an attribute in place of datetime.utcnow()
+    """
+    type = db.DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _compile_utcnow(element, compiler, **kw):
+    """Generic SQL: CURRENT_TIMESTAMP is UTC on SQLite"""
+    return 'CURRENT_TIMESTAMP'
+
+
+@compiles(utcnow, 'sqlite')
+def _compile_utcnow_sqlite(element, compiler, **kw):
+    """SQLite: UTC with millisecond precision"""
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+@compiles(utcnow, 'postgresql')
+def _compile_utcnow_postgresql(element, compiler, **kw):
+    """PostgreSQL: convert from the session time zone to naive UTC"""
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+# gin_trgm_ops needs the pg_trgm extension before the users indexes exist
+event.listen(
+    db.Model.metadata,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
+
+
 class User(db.Model):
     """User model with authentication support"""
     __tablename__ = 'users'
     __table_args__ = (
         db.Index('idx_user_email', 'email'),
         db.Index('idx_user_online', 'online'),
+        db.Index('idx_user_role', 'role'),
+        # Team member listings are ordered by name
+        db.Index('idx_user_name', 'name'),
+        # Trigram indexes for the '%term%' ILIKE searches (PostgreSQL only)
+        db.Index(
+            'idx_user_name_trgm', 'name',
+            postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}
+        ).ddl_if(dialect='postgresql'),
+        db.Index(
+            'idx_user_email_trgm', 'email',
+            postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}
+        ).ddl_if(dialect='postgresql'),
     )
     
     id = db.Column(db.Integer, primary_key=True)
@@ -66,8 +116,12 @@ class Task(db.Model):
     __table_args__ = (
         db.Index('idx_task_status', 'status'),
         db.Index('idx_task_urgent', 'urgent'),
-        db.Index('idx_task_assignee', 'assignee_id'),
+        # Member task lists and completed-task counts filter by person + status
+        db.Index('idx_task_assignee_status', 'assignee_id', 'status'),
+        db.Index('idx_task_supervisor_status', 'supervisor_id', 'status'),
         db.Index('idx_task_deadline', 'deadline'),
+        # Backs get_tasks: filter by status, order by urgent DESC, deadline ASC
+        db.Index('idx_task_status_urgent_deadline', 'status', db.desc('urgent'), 'deadline'),
     )
     
     id = db.Column(db.Integer, primary_key=True)
@@ -114,6 +168,10 @@ class Email(db.Model):
         db.Index('idx_email_priority', 'priority'),
         db.Index('idx_email_read', 'read'),
         db.Index('idx_email_user', 'user_id'),
+        # Composite indexes matching the /emails filter + newest-first sort
+        db.Index('idx_email_user_received', 'user_id', 'received_at'),
+        db.Index('idx_email_user_read_received', 'user_id', 'read', 'received_at'),
+        db.Index('idx_email_user_priority_received', 'user_id', 'priority', 'received_at'),
     )
     
     id = db.Column(db.Integer, primary_key=True)
@@ -207,7 +265,9 @@ class TaskShare(db.Model):
     """Model for task sharing and access control via email links"""
     __tablename__ = 'task_shares'
     __table_args__ = (
-        db.Index('idx_share_token', 'share_token'),
+        # Tokens are random and only ever matched by equality; uniqueness
+        # is enforced by the column's unique constraint
+        db.Index('idx_share_token', 'share_token', postgresql_using='hash'),
         db.Index('idx_share_task', 'task_id'),
         db.Index('idx_share_expires', 'expires_at'),
     )
@@ -215,7 +275,7 @@ class TaskShare(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False, index=True)
     shared_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    share_token = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    share_token = db.Column(db.String(64), unique=True, nullable=False)
     permission = db.Column(db.String(20), default='view')  # view, edit, admin
     expires_at = db.Column(db.DateTime, nullable=True, index=True)
     access_count = db.Column(db.Integer, default=0)
@@ -265,6 +325,9 @@ class File(db.Model):
         db.Index('idx_file_task', 'task_id'),
         db.Index('idx_file_hash', 'file_hash'),
         db.Index('idx_file_public', 'is_public'),
+        # Composite indexes matching the file listing filter + newest-first sort
+        db.Index('idx_file_uploader_created', 'uploaded_by', 'created_at'),
+        db.Index('idx_file_public_created', 'is_public', 'created_at'),
     )
     
     id = db.Column(db.Integer, primary_key=True)
@@ -278,6 +341,7 @@ class File(db.Model):
     thumbnail_path = db.Column(db.String(500))
     description = db.Column(db.Text)
     extracted_text = db.Column(db.Text)  # For AI processing
+    parsed_metadata = db.Column(db.Text)  # JSON: file_type, summary, metadata, statistics from last parse
     
     # Relationships
     uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
@@ -301,7 +365,23 @@ class File(db.Model):
     
     def to_dict(self, include_uploader=False):
         """Convert to dictionary"""
-        data = {
+        data = self.to_list_dict(self.extracted_text is not None)
+        
+        if include_uploader and self.uploader:
+            data['uploader'] = {
+                'id': self.uploader.id,
+                'name': self.uploader.name,
+                'email': self.uploader.email
+            }
+        
+        return data
+    
+    def to_list_dict(self, has_extracted_text):
+        """
+        Convert to dictionary without touching extracted_text, so listings
+        can defer that column and pass whether it is set instead
+        """
+        return {
             'id': self.id,
             'filename': self.filename,
             'original_filename': self.original_filename,
@@ -311,7 +391,7 @@ class File(db.Model):
             'category': self.category,
             'description': self.description,
             'has_thumbnail': self.thumbnail_path is not None,
-            'has_extracted_text': self.extracted_text is not None,
+            'has_extracted_text': has_extracted_text,
             'is_public': self.is_public,
             'download_count': self.download_count,
             'last_accessed': self.last_accessed.isoformat() if self.last_accessed else None,
@@ -319,19 +399,14 @@ class File(db.Model):
             'uploaded_by': self.uploaded_by,
             'task_id': self.task_id
         }
-        
-        if include_uploader and self.uploader:
-            data['uploader'] = {
-                'id': self.uploader.id,
-                'name': self.uploader.name,
-                'email': self.uploader.email
-            }
-        
-        return data
     
     def format_file_size(self):
         """Format file size in human-readable format"""
-        size = self.file_size
+        return File.format_size(self.file_size)
+    
+    @staticmethod
+    def format_size(size):
+        """Format a size in bytes in human-readable format"""
         for unit in ['B', 'KB', 'MB', 'GB']:
             if size < 1024.0:
                 return f"{size:.1f} {unit}"
@@ -2,7 +2,7 @@
 Enhanced Task Instance Models with Native AI Integration
 """
 from datetime import datetime
-from ..models.models import db
+from ..models.models import db, utcnow
 
 
 class TaskInstance(db.Model):
@@ -34,7 +34,7 @@ class TaskInstance(db.Model):
     started_at = db.Column(db.DateTime)
     completed_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=utcnow(), server_default=utcnow(), onupdate=utcnow())
     
     # AI Integration
     ai_context = db.Column(db.Text)  # AI's understanding of the task
@@ -51,8 +51,13 @@ class TaskInstance(db.Model):
     ai_logs = db.relationship('TaskAILog', backref='task', lazy='dynamic', cascade='all, delete-orphan')
     collaborators = db.relationship('TaskCollaborator', backref='task', lazy='dynamic', cascade='all, delete-orphan')
     
-    def to_dict(self, include_details=False):
-        """Convert to dictionary"""
+    def to_dict(self, include_details=False, subtasks=None, task_files=None, collaborators=None):
+        """
+        Convert to dictionary
+        
+        Already loaded subtasks, task_files and collaborators can be passed
+        in to avoid querying the dynamic relationships again.
+        """
         data = {
             'id': self.id,
             'title': self.title,
@@ -75,9 +80,9 @@ class TaskInstance(db.Model):
                 'owner': self.owner.to_dict() if self.owner else None,
                 'supervisor': self.supervisor.to_dict() if self.supervisor else None,
                 'assignee': self.assignee.to_dict() if self.assignee else None,
-                'subtasks': [st.to_dict() for st in self.subtasks.all()],
-                'files': [tf.to_dict() for tf in self.task_files.all()],
-                'collaborators': [c.to_dict() for c in self.collaborators.all()],
+                'subtasks': [st.to_dict() for st in (self.subtasks.all() if subtasks is None else subtasks)],
+                'files': [tf.to_dict() for tf in (self.task_files.all() if task_files is None else task_files)],
+                'collaborators': [c.to_dict() for c in (self.collaborators.all() if collaborators is None else collaborators)],
                 'ai_context': self.ai_context,
                 'ai_suggestions': self.ai_suggestions,
             })
@@ -111,7 +116,7 @@ class SubTask(db.Model):
     due_date = db.Column(db.DateTime)
     completed_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=utcnow(), server_default=utcnow(), onupdate=utcnow())
     
     # Relationships
     assignee = db.relationship('User', foreign_keys=[assignee_id], backref='subtasks')
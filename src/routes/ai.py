@@ -1,11 +1,12 @@
 """
 AI integration routes - Refactored to use AIService
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from src.middleware.auth import token_required
 from src.utils.validation import validate_request, AIPromptSchema
 from src.utils.errors import APIError
 from src.services.ai_service import get_ai_service
+from src.services.job_queue import submit_job, job_result_response
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,34 +24,30 @@ def chat_with_ai(current_user_id=None):
     POST /api/ai/chat
     Headers: Authorization: Bearer <token>
     {
-        "message": "Hello, how can you help me?"
+        "message": "Hello, how can you help me?",
+        "background": false  # optional
     }
+    
+    With "background": true the AI call runs in the background instead of
+    holding this request's worker thread for the whole generation; the
+    response is 202 with a task_id to poll at GET /api/ai/chat/result/<task_id>
+    (results are held in the accepting process; see services/job_queue)
     """
     data = request.validated_data
     user_message = data.get('message', '')
     session_id = data.get('session_id')  # Optional session ID for conversation continuity
     
+    if data.get('background'):
+        task_id = submit_job(
+            current_app._get_current_object(),
+            current_user_id,
+            _run_chat,
+            current_user_id, user_message, session_id
+        )
+        return jsonify({'task_id': task_id, 'status': 'pending'}), 202
+    
     try:
-        ai_service = get_ai_service()
-        
-        # Use memory-aware chat if user is authenticated and method exists
-        if current_user_id and hasattr(ai_service, 'chat_with_memory'):
-            response = ai_service.chat_with_memory(
-                user_id=current_user_id,
-                message=user_message,
-                session_id=session_id
-            )
-        else:
-            # Fallback to regular chat without memory
-            response = ai_service.chat(user_message)
-        
-        return jsonify({
-            'message': response.get('message', response.get('response', '')),
-            'model': response.get('model', 'unknown'),
-            'provider': response.get('provider', 'unknown'),
-            'session_id': session_id,
-            'success': True
-        }), 200
+        return jsonify(_run_chat(current_user_id, user_message, session_id)), 200
         
     except APIError as e:
         return jsonify({
@@ -59,6 +56,45 @@ def chat_with_ai(current_user_id=None):
         }), e.status_code
 
 
+def _run_chat(user_id, user_message, session_id):
+    """Get the assistant's reply to a chat message (also run as a background job)"""
+    ai_service = get_ai_service()
+    
+    # Use memory-aware chat if user is authenticated and method exists
+    if user_id and hasattr(ai_service, 'chat_with_memory'):
+        response = ai_service.chat_with_memory(
+            user_id=user_id,
+            message=user_message,
+            session_id=session_id
+        )
+    else:
+        # Fallback to regular chat without memory
+        response = ai_service.chat(user_message)
+    
+    return {
+        'message': response.get('message', response.get('response', '')),
+        'model': response.get('model', 'unknown'),
+        'provider': response.get('provider', 'unknown'),
+        'session_id': session_id,
+        'success': True
+    }
+
+
+@ai_bp.route('/chat/result/<task_id>', methods=['GET'])
+@token_required
+def get_chat_result(task_id, current_user_id=None):
+    """
+    Poll the result of a background chat request
+    
+    GET /api/ai/chat/result/<task_id>
+    
+    Returns:
+        202 while the reply is being generated, the chat payload when it
+        completed, or the error status when it failed
+    """
+    return job_result_response(task_id, current_user_id)
+
+
 @ai_bp.route('/agents/<agent_name>', methods=['POST'])
 @token_required
 def execute_agent(agent_name, current_user_id=None):
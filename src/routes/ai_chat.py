@@ -16,9 +16,13 @@ from ..models.chat_models import AIChat, AIChatMessage, TaskChat, ChatMessage
 from ..middleware.auth import token_required
 from ..utils.errors import APIError, NotFoundError, AuthorizationError
 from ..utils.validation import sanitize_string
+from ..services.ai_providers.base import create_http_session
 
 ai_chat_bp = Blueprint('ai_chat', __name__)
 
+# Pooled HTTP client for AI chat calls
+_ai_session = create_http_session()
+
 
 @ai_chat_bp.route('/tasks/<int:task_id>/ai-chat', methods=['POST', 'GET'])
 @token_required
@@ -282,7 +286,7 @@ def _get_group_chat_context(task_id, limit=50):
     messages = ChatMessage.query.filter_by(
         chat_id=task_chat.id,
         is_deleted=False
-    ).order_by(ChatMessage.created_at.desc()).limit(limit).all()
+    ).order_by(ChatMessage.id.desc()).limit(limit).all()
     
     if not messages:
         return None
@@ -360,7 +364,7 @@ Task status: {task.status}
     full_prompt = f"{system_prompt}\n\nUser: {user_message}\n\nAssistant:"
     
     try:
-        response = requests.post(
+        response = _ai_session.post(
             ai_api_url,
             json={
                 'model': ai_model,
@@ -3,13 +3,15 @@ Authentication routes with httpOnly cookie support
 """
 from flask import Blueprint, request, jsonify, make_response
 from flask_jwt_extended import (
-    create_access_token, create_refresh_token,
+    create_refresh_token,
     jwt_required, get_jwt_identity, unset_jwt_cookies
 )
 from datetime import datetime, timedelta
 from src.models.models import db, User
 from src.utils.validation import validate_request, LoginSchema, RegisterSchema
 from src.utils.errors import AuthenticationError, ValidationError, ConflictError
+from src.middleware.auth import create_user_access_token, set_access_cookie
+from src.services.response_cache import invalidate, TEAM_KEYS
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -33,7 +35,7 @@ def register():
     data = request.validated_data
     
     # Check if user already exists
-    if User.query.filter_by(email=data['email']).first():
+    if db.session.query(User.query.filter_by(email=data['email']).exists()).scalar():
         raise ConflictError('User with this email already exists')
     
     # Create new user
@@ -47,9 +49,10 @@ def register():
     
     db.session.add(user)
     db.session.commit()
+    invalidate(*TEAM_KEYS)
     
     # Create tokens with string identity
-    access_token = create_access_token(identity=str(user.id))
+    access_token = create_user_access_token(user)
     refresh_token = create_refresh_token(identity=str(user.id))
     
     # Create response with httpOnly cookies
@@ -107,9 +110,10 @@ def login():
     user.last_login = datetime.utcnow()
     user.online = True
     db.session.commit()
+    invalidate(*TEAM_KEYS)
     
     # Create tokens with string identity
-    access_token = create_access_token(identity=str(user.id))
+    access_token = create_user_access_token(user)
     refresh_token = create_refresh_token(identity=str(user.id))
     
     # Create response with httpOnly cookies
@@ -162,6 +166,7 @@ def logout():
     if user:
         user.online = False
         db.session.commit()
+        invalidate(*TEAM_KEYS)
     
     # Create response and clear cookies
     response = make_response(jsonify({'message': 'Logout successful'}), 200)
@@ -189,22 +194,19 @@ def refresh():
     if isinstance(user_id, str):
         user_id = int(user_id)
     
-    # Create new access token with string identity
-    access_token = create_access_token(identity=str(user_id))
+    # Load the user so the new access token carries their current name
+    # (refresh tokens live 30 days and don't carry it)
+    user = User.query.get(user_id)
+    
+    if not user:
+        raise AuthenticationError('User not found')
     
     # Create response with new access token cookie
     response = make_response(jsonify({
         'message': 'Token refreshed successfully'
     }), 200)
     
-    response.set_cookie(
-        'access_token',
-        value=access_token,
-        httponly=True,
-        secure=request.is_secure,
-        samesite='Lax',
-        max_age=timedelta(hours=1)
-    )
+    set_access_cookie(response, create_user_access_token(user))
     
     return response
 
@@ -255,6 +257,7 @@ def update_profile():
         raise AuthenticationError('User not found')
     
     data = request.get_json()
+    name_changed = 'name' in data and data['name'] != user.name
     
     if 'name' in data:
         user.name = data['name']
@@ -262,9 +265,16 @@ def update_profile():
         user.role = data['role']
     
     db.session.commit()
+    invalidate(*TEAM_KEYS)
     
-    return jsonify({
+    response = make_response(jsonify({
         'message': 'Profile updated successfully',
         'user': user.to_dict()
-    }), 200
+    }), 200)
+    
+    # Reissue the access token so its name claim follows the rename
+    if name_changed:
+        set_access_cookie(response, create_user_access_token(user))
+    
+    return response
 
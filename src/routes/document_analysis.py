@@ -2,15 +2,17 @@
 Document Analysis Routes
 Advanced document parsing and AI-powered analysis
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 import os
+import json
 import logging
 
 from ..models.models import db, File
 from ..middleware.auth import token_required
 from ..utils.errors import APIError
 from ..services.document_parsers import DocumentParserService
-from ..services.ai_service import AIService
+from ..services.ai_service import get_ai_service
+from ..services.job_queue import submit_job, job_result_response
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +21,13 @@ document_analysis_bp = Blueprint('document_analysis', __name__)
 # Configuration
 UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
 
+# Characters of extracted text kept on the file record; covers the largest
+# AI context requested below (8000)
+STORED_TEXT_LENGTH = 10000
+
+# Upper bound on files accepted by /parse/batch
+MAX_BATCH_PARSE_FILES = 50
+
 
 @document_analysis_bp.route('/parse/<int:file_id>', methods=['POST'])
 @token_required
@@ -26,7 +35,10 @@ def parse_document(file_id, current_user_id=None):
     """
     Parse a document and extract structured content
     
-    POST /api/documents/parse/<file_id>
+    POST /api/documents/parse/<file_id>?force=true
+    
+    Results of the first successful parse are stored on the file record and
+    returned directly on later calls; pass force=true to parse again.
     
     Returns:
         - Full parsed content
@@ -35,24 +47,10 @@ def parse_document(file_id, current_user_id=None):
         - Summary
     """
     try:
-        # Get file from database
-        file = File.query.get(file_id)
-        
-        if not file:
-            raise APIError('File not found', 404)
-        
-        # Check access permissions
-        if not file.is_public and file.uploaded_by != current_user_id:
-            raise APIError('Access denied', 403)
+        file, file_path = _get_accessible_file(file_id, current_user_id)
+        force = request.args.get('force', 'false').lower() == 'true'
         
-        # Get file path
-        file_path = os.path.join(UPLOAD_FOLDER, file.file_path)
-        
-        if not os.path.exists(file_path):
-            raise APIError('File not found on server', 404)
-        
-        # Parse the document
-        parsed_data = DocumentParserService.parse_document(file_path)
+        parsed_data = get_parsed_or_stored(file, file_path, force=force)
         
         if not parsed_data.get('success'):
             raise APIError(
@@ -60,28 +58,99 @@ def parse_document(file_id, current_user_id=None):
                 400
             )
         
-        # Update file record with extracted text if not already set
-        if not file.extracted_text and parsed_data.get('text'):
-            file.extracted_text = parsed_data['text'][:10000]  # Store first 10k chars
+        return jsonify(_parse_response(file, parsed_data)), 200
+        
+    except APIError as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Error parsing document: {e}")
+        raise APIError(f'Error parsing document: {str(e)}', 500)
+
+
+@document_analysis_bp.route('/parse/batch', methods=['POST'])
+@token_required
+def parse_documents_batch(current_user_id=None):
+    """
+    Parse several documents in one request
+    
+    POST /api/documents/parse/batch?force=true
+    {
+        "file_ids": [1, 2, 3]
+    }
+    
+    Files are parsed concurrently and all new parse results are stored
+    with a single bulk update.
+    
+    Returns:
+        One /parse result per file id, in request order; files that could
+        not be accessed or parsed carry parsed_successfully=false and an error
+    """
+    data = request.get_json(silent=True) or {}
+    file_ids = data.get('file_ids')
+    force = request.args.get('force', 'false').lower() == 'true'
+    
+    if not file_ids or not isinstance(file_ids, list):
+        raise APIError('file_ids must be a non-empty list', 400)
+    
+    if len(file_ids) > MAX_BATCH_PARSE_FILES:
+        raise APIError(f'Too many files (max {MAX_BATCH_PARSE_FILES})', 400)
+    
+    if not all(isinstance(i, int) and not isinstance(i, bool) for i in file_ids):
+        raise APIError('file_ids must contain integers', 400)
+    
+    try:
+        files = {f.id: f for f in File.query.filter(File.id.in_(file_ids)).all()}
+        
+        results = {}
+        to_parse = []
+        for file_id in dict.fromkeys(file_ids):
+            file = files.get(file_id)
+            if not file:
+                results[file_id] = _parse_error(file_id, 'File not found')
+            elif not file.is_public and file.uploaded_by != current_user_id:
+                results[file_id] = _parse_error(file_id, 'Access denied')
+            elif not force and file.extracted_text and file.parsed_metadata:
+                results[file_id] = _parse_response(file, get_parsed_or_stored(file, None))
+            else:
+                file_path = os.path.join(UPLOAD_FOLDER, file.file_path)
+                if os.path.exists(file_path):
+                    to_parse.append((file, file_path))
+                else:
+                    results[file_id] = _parse_error(file_id, 'File not found on server')
+        
+        parsed_list = DocumentParserService.parse_documents(
+            [file_path for _, file_path in to_parse]
+        )
+        
+        updates = []
+        for (file, _), parsed_data in zip(to_parse, parsed_list):
+            if not parsed_data.get('success'):
+                results[file.id] = _parse_error(
+                    file.id,
+                    f"Failed to parse document: {parsed_data.get('error', 'Unknown error')}"
+                )
+                continue
+            
+            results[file.id] = _parse_response(file, parsed_data)
+            if parsed_data.get('text'):
+                updates.append({'id': file.id, **_stored_parse_fields(parsed_data)})
+        
+        # Persist all new parse results in one round trip
+        if updates:
+            db.session.bulk_update_mappings(File, updates)
             db.session.commit()
         
         return jsonify({
-            'file_id': file_id,
-            'filename': file.filename,
-            'file_type': parsed_data.get('file_type'),
-            'summary': parsed_data.get('summary'),
-            'metadata': parsed_data.get('metadata', {}),
-            'statistics': parsed_data.get('statistics', {}),
-            'content_preview': parsed_data.get('text', '')[:500],  # First 500 chars
-            'full_content_length': len(parsed_data.get('text', '')),
-            'parsed_successfully': True
+            'results': [results[file_id] for file_id in file_ids],
+            'count': len(file_ids)
         }), 200
         
     except APIError as e:
         raise e
     except Exception as e:
-        logger.error(f"Error parsing document: {e}")
-        raise APIError(f'Error parsing document: {str(e)}', 500)
+        db.session.rollback()
+        logger.error(f"Error batch parsing documents: {e}")
+        raise APIError(f'Error parsing documents: {str(e)}', 500)
 
 
 @document_analysis_bp.route('/analyze/<int:file_id>', methods=['POST'])
@@ -96,72 +165,32 @@ def analyze_document_with_ai(file_id, current_user_id=None):
         "custom_prompt": "optional custom prompt"
     }
     
+    Parsing and the AI call run in the background.
+    
     Returns:
-        AI-generated analysis of the document
+        202 with a task_id to poll at GET /api/documents/analyze/result/<task_id>
+        (results are held in the accepting process; see services/job_queue)
     """
     try:
-        # Get file from database
-        file = File.query.get(file_id)
-        
-        if not file:
-            raise APIError('File not found', 404)
-        
-        # Check access permissions
-        if not file.is_public and file.uploaded_by != current_user_id:
-            raise APIError('Access denied', 403)
-        
-        # Get file path
-        file_path = os.path.join(UPLOAD_FOLDER, file.file_path)
-        
-        if not os.path.exists(file_path):
-            raise APIError('File not found on server', 404)
-        
-        # Parse the document first
-        parsed_data = DocumentParserService.parse_document(file_path)
-        
-        if not parsed_data.get('success'):
-            raise APIError(
-                f"Failed to parse document: {parsed_data.get('error', 'Unknown error')}",
-                400
-            )
+        _, file_path = _get_accessible_file(file_id, current_user_id)
         
         # Get analysis parameters
-        data = request.get_json() or {}
+        data = request.get_json(silent=True) or {}
         analysis_type = data.get('analysis_type', 'summary')
         custom_prompt = data.get('custom_prompt')
         
-        # Generate AI context from parsed document
-        document_context = DocumentParserService.get_ai_context(parsed_data, max_length=8000)
-        
-        # Prepare AI prompts
-        prompts = {
-            'summary': f"Please provide a comprehensive summary of this document:\n\n{document_context}",
-            'keywords': f"Extract and list the key topics, concepts, and keywords from this document:\n\n{document_context}",
-            'questions': f"Generate 5-7 important questions that this document answers or addresses:\n\n{document_context}",
-            'insights': f"Analyze this document and provide key insights, main points, and important takeaways:\n\n{document_context}",
-            'action_items': f"Identify any action items, tasks, or recommendations mentioned in this document:\n\n{document_context}"
-        }
-        
-        # Use custom prompt if provided
-        if analysis_type == 'custom' and custom_prompt:
-            prompt = f"{custom_prompt}\n\nDocument content:\n{document_context}"
-        else:
-            prompt = prompts.get(analysis_type, prompts['summary'])
-        
-        # Call AI service
-        ai_service = AIService()
-        ai_response = ai_service.generate_response(prompt)
+        task_id = submit_job(
+            current_app._get_current_object(),
+            current_user_id,
+            _run_document_analysis,
+            file_id, file_path, analysis_type, custom_prompt
+        )
         
         return jsonify({
-            'file_id': file_id,
-            'filename': file.filename,
-            'file_type': parsed_data.get('file_type'),
-            'analysis_type': analysis_type,
-            'document_summary': parsed_data.get('summary'),
-            'ai_analysis': ai_response,
-            'metadata': parsed_data.get('metadata', {}),
-            'statistics': parsed_data.get('statistics', {})
-        }), 200
+            'task_id': task_id,
+            'status': 'pending',
+            'file_id': file_id
+        }), 202
         
     except APIError as e:
         raise e
@@ -170,6 +199,55 @@ def analyze_document_with_ai(file_id, current_user_id=None):
         raise APIError(f'Error analyzing document: {str(e)}', 500)
 
 
+def _run_document_analysis(file_id, file_path, analysis_type, custom_prompt):
+    """Parse a document and run the requested AI analysis (background job)"""
+    file = File.query.get(file_id)
+    if not file:
+        raise APIError('File not found', 404)
+    
+    # Parse the document first (or reuse stored parse results)
+    parsed_data = get_parsed_or_stored(file, file_path)
+    
+    if not parsed_data.get('success'):
+        raise APIError(
+            f"Failed to parse document: {parsed_data.get('error', 'Unknown error')}",
+            400
+        )
+    
+    # Generate AI context from parsed document
+    document_context = DocumentParserService.get_ai_context(parsed_data, max_length=8000)
+    
+    # Prepare AI prompts
+    prompts = {
+        'summary': f"Please provide a comprehensive summary of this document:\n\n{document_context}",
+        'keywords': f"Extract and list the key topics, concepts, and keywords from this document:\n\n{document_context}",
+        'questions': f"Generate 5-7 important questions that this document answers or addresses:\n\n{document_context}",
+        'insights': f"Analyze this document and provide key insights, main points, and important takeaways:\n\n{document_context}",
+        'action_items': f"Identify any action items, tasks, or recommendations mentioned in this document:\n\n{document_context}"
+    }
+    
+    # Use custom prompt if provided
+    if analysis_type == 'custom' and custom_prompt:
+        prompt = f"{custom_prompt}\n\nDocument content:\n{document_context}"
+    else:
+        prompt = prompts.get(analysis_type, prompts['summary'])
+    
+    # Call AI service
+    ai_service = get_ai_service()
+    ai_response = ai_service.generate_response(prompt)
+    
+    return {
+        'file_id': file_id,
+        'filename': file.filename,
+        'file_type': parsed_data.get('file_type'),
+        'analysis_type': analysis_type,
+        'document_summary': parsed_data.get('summary'),
+        'ai_analysis': ai_response,
+        'metadata': parsed_data.get('metadata', {}),
+        'statistics': parsed_data.get('statistics', {})
+    }
+
+
 @document_analysis_bp.route('/chat/<int:file_id>', methods=['POST'])
 @token_required
 def chat_about_document(file_id, current_user_id=None):
@@ -182,48 +260,61 @@ def chat_about_document(file_id, current_user_id=None):
         "conversation_history": []  # optional
     }
     
+    Parsing and the AI call run in the background.
+    
     Returns:
-        AI response with document context
+        202 with a task_id to poll at GET /api/documents/chat/result/<task_id>
+        (results are held in the accepting process; see services/job_queue)
     """
     try:
-        # Get file from database
-        file = File.query.get(file_id)
-        
-        if not file:
-            raise APIError('File not found', 404)
-        
-        # Check access permissions
-        if not file.is_public and file.uploaded_by != current_user_id:
-            raise APIError('Access denied', 403)
-        
-        # Get file path
-        file_path = os.path.join(UPLOAD_FOLDER, file.file_path)
-        
-        if not os.path.exists(file_path):
-            raise APIError('File not found on server', 404)
-        
-        # Parse the document
-        parsed_data = DocumentParserService.parse_document(file_path)
-        
-        if not parsed_data.get('success'):
-            raise APIError(
-                f"Failed to parse document: {parsed_data.get('error', 'Unknown error')}",
-                400
-            )
+        _, file_path = _get_accessible_file(file_id, current_user_id)
         
         # Get chat parameters
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data or 'message' not in data:
             raise APIError('Message is required', 400)
         
-        user_message = data['message']
-        conversation_history = data.get('conversation_history', [])
+        task_id = submit_job(
+            current_app._get_current_object(),
+            current_user_id,
+            _run_document_chat,
+            file_id, file_path,
+            data['message'], data.get('conversation_history', [])
+        )
         
-        # Generate AI context from document
-        document_context = DocumentParserService.get_ai_context(parsed_data, max_length=6000)
+        return jsonify({
+            'task_id': task_id,
+            'status': 'pending',
+            'file_id': file_id
+        }), 202
         
-        # Build conversation prompt
-        system_prompt = f"""You are an AI assistant helping analyze and discuss a document.
+    except APIError as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Error in document chat: {e}")
+        raise APIError(f'Error in document chat: {str(e)}', 500)
+
+
+def _run_document_chat(file_id, file_path, user_message, conversation_history):
+    """Parse a document and answer a chat message about it (background job)"""
+    file = File.query.get(file_id)
+    if not file:
+        raise APIError('File not found', 404)
+    
+    # Parse the document (or reuse stored parse results)
+    parsed_data = get_parsed_or_stored(file, file_path)
+    
+    if not parsed_data.get('success'):
+        raise APIError(
+            f"Failed to parse document: {parsed_data.get('error', 'Unknown error')}",
+            400
+        )
+    
+    # Generate AI context from document
+    document_context = DocumentParserService.get_ai_context(parsed_data, max_length=6000)
+    
+    # Build conversation prompt
+    system_prompt = f"""You are an AI assistant helping analyze and discuss a document.
 
 Document Information:
 {parsed_data.get('summary', 'No summary available')}
@@ -232,41 +323,152 @@ Document Content:
 {document_context}
 
 Please answer questions about this document accurately and helpfully. If the answer is not in the document, say so."""
+    
+    # Build conversation with history
+    conversation = [{"role": "system", "content": system_prompt}]
+    
+    # Add conversation history if provided
+    for msg in conversation_history[-5:]:  # Last 5 messages
+        conversation.append({
+            "role": msg.get('role', 'user'),
+            "content": msg.get('content', '')
+        })
+    
+    # Add current user message
+    conversation.append({"role": "user", "content": user_message})
+    
+    # Call AI service
+    ai_service = get_ai_service()
+    ai_response = ai_service.chat(conversation)
+    
+    return {
+        'file_id': file_id,
+        'filename': file.filename,
+        'message': user_message,
+        'response': ai_response,
+        'document_info': {
+            'type': parsed_data.get('file_type'),
+            'summary': parsed_data.get('summary'),
+            'statistics': parsed_data.get('statistics', {})
+        }
+    }
+
+
+@document_analysis_bp.route('/analyze/result/<task_id>', methods=['GET'])
+@document_analysis_bp.route('/chat/result/<task_id>', methods=['GET'])
+@token_required
+def get_document_task_result(task_id, current_user_id=None):
+    """
+    Poll the result of a background analyze/chat task
+    
+    GET /api/documents/analyze/result/<task_id>
+    GET /api/documents/chat/result/<task_id>
+    
+    Returns:
+        202 while the task is running, the task payload when it completed,
+        or the task's error status when it failed
+    """
+    return job_result_response(task_id, current_user_id)
+
+
+def get_parsed_or_stored(file, file_path, force=False):
+    """
+    Get parsed document data, reusing results stored on the file record
+    
+    When a previous parse stored extracted_text and parsed_metadata, the
+    parsed data is rebuilt from them without reading the file. Otherwise
+    the document is parsed and the results are stored for next time.
+    
+    Args:
+        file: File record
+        file_path: Path to the file on disk
+        force: Always parse the file, refreshing the stored results
         
-        # Build conversation with history
-        conversation = [{"role": "system", "content": system_prompt}]
-        
-        # Add conversation history if provided
-        for msg in conversation_history[-5:]:  # Last 5 messages
-            conversation.append({
-                "role": msg.get('role', 'user'),
-                "content": msg.get('content', '')
-            })
-        
-        # Add current user message
-        conversation.append({"role": "user", "content": user_message})
-        
-        # Call AI service
-        ai_service = AIService()
-        ai_response = ai_service.chat(conversation)
-        
-        return jsonify({
-            'file_id': file_id,
-            'filename': file.filename,
-            'message': user_message,
-            'response': ai_response,
-            'document_info': {
-                'type': parsed_data.get('file_type'),
-                'summary': parsed_data.get('summary'),
-                'statistics': parsed_data.get('statistics', {})
-            }
-        }), 200
-        
-    except APIError as e:
-        raise e
-    except Exception as e:
-        logger.error(f"Error in document chat: {e}")
-        raise APIError(f'Error in document chat: {str(e)}', 500)
+    Returns:
+        Parsed data in the DocumentParserService.parse_document() format
+    """
+    if not force and file.extracted_text and file.parsed_metadata:
+        stored = json.loads(file.parsed_metadata)
+        parsed_data = {
+            'success': True,
+            'text': file.extracted_text,
+            'file_type': stored.get('file_type'),
+            'summary': stored.get('summary'),
+            'metadata': stored.get('metadata', {}),
+            'statistics': stored.get('statistics', {}),
+            'full_content_length': stored.get('full_content_length', len(file.extracted_text))
+        }
+        parsed_data['doc_hash'] = DocumentParserService.compute_doc_hash(parsed_data)
+        return parsed_data
+    
+    parsed_data = DocumentParserService.parse_document(file_path)
+    
+    # Store extracted text and parse results for later requests
+    if parsed_data.get('success') and parsed_data.get('text'):
+        for column, value in _stored_parse_fields(parsed_data).items():
+            setattr(file, column, value)
+        db.session.commit()
+    
+    return parsed_data
+
+
+def _stored_parse_fields(parsed_data):
+    """File column values that cache a successful parse"""
+    return {
+        'extracted_text': parsed_data['text'][:STORED_TEXT_LENGTH],
+        'parsed_metadata': json.dumps({
+            'file_type': parsed_data.get('file_type'),
+            'summary': parsed_data.get('summary'),
+            'metadata': parsed_data.get('metadata', {}),
+            'statistics': parsed_data.get('statistics', {}),
+            'full_content_length': len(parsed_data['text'])
+        }, default=str)
+    }
+
+
+def _parse_response(file, parsed_data):
+    """Build the /parse response body for a file"""
+    text = parsed_data.get('text', '')
+    return {
+        'file_id': file.id,
+        'filename': file.filename,
+        'file_type': parsed_data.get('file_type'),
+        'summary': parsed_data.get('summary'),
+        'metadata': parsed_data.get('metadata', {}),
+        'statistics': parsed_data.get('statistics', {}),
+        'content_preview': text[:500],  # First 500 chars
+        'full_content_length': parsed_data.get('full_content_length', len(text)),
+        'parsed_successfully': True
+    }
+
+
+def _parse_error(file_id, error):
+    """Build a failed /parse/batch entry"""
+    return {
+        'file_id': file_id,
+        'parsed_successfully': False,
+        'error': error
+    }
+
+
+def _get_accessible_file(file_id, current_user_id):
+    """Load a file record and its on-disk path, enforcing access rules"""
+    file = File.query.get(file_id)
+    
+    if not file:
+        raise APIError('File not found', 404)
+    
+    # Check access permissions
+    if not file.is_public and file.uploaded_by != current_user_id:
+        raise APIError('Access denied', 403)
+    
+    # Get file path
+    file_path = os.path.join(UPLOAD_FOLDER, file.file_path)
+    
+    if not os.path.exists(file_path):
+        raise APIError('File not found on server', 404)
+    
+    return file, file_path
 
 
 @document_analysis_bp.route('/supported-types', methods=['GET'])
@@ -2,49 +2,76 @@
 Email Routes - Email Management API
 Handles email listing, reading, and basic operations
 """
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import or_, and_
+import base64
+
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import or_, and_, func, tuple_
 from datetime import datetime
 
 from src.models.models import db, Email, User
 from src.middleware.auth import token_required
+from src.services.email_read_queue import enqueue_mark_read
 
 email_bp = Blueprint('email', __name__)
 
+# Number of body characters included in listing previews
+EMAIL_PREVIEW_LENGTH = 200
+
+# Upper bound on ids accepted by the bulk endpoints
+MAX_BULK_EMAIL_IDS = 1000
+
 
 @email_bp.route('/emails', methods=['GET'])
-@jwt_required()
 @token_required
 def get_emails(current_user_id):
     """
-    Get emails for current user with filtering and pagination
+    Get emails for current user with filtering and cursor pagination
     
     Query Parameters:
-    - page: Page number (default: 1)
+    - cursor: Opaque cursor from a previous response's next_cursor
     - per_page: Items per page (default: 20, max: 100)
     - priority: Filter by priority (priority, normal, low)
     - read: Filter by read status (true/false)
     - search: Search in subject and body
+    - count: Set to 1 to also return the total number of matching emails
+    
+    Only a short body preview is returned; use GET /emails/<id> for the
+    full body.
     """
     try:
         # Get query parameters
-        page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
         priority = request.args.get('priority', type=str)
         read_status = request.args.get('read', type=str)
         search = request.args.get('search', type=str)
-        
-        # Build query
-        query = Email.query.filter_by(user_id=current_user_id)
+        cursor = request.args.get('cursor', type=str)
+        include_count = request.args.get('count', type=str) == '1'
+        
+        if cursor:
+            try:
+                cursor_ts, cursor_id = _decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+        
+        # Build query - project only the listing columns so the full body
+        # is never loaded or serialized
+        query = db.session.query(
+            Email.id,
+            Email.sender,
+            Email.subject,
+            func.substr(Email.body, 1, EMAIL_PREVIEW_LENGTH).label('preview'),
+            Email.priority,
+            Email.read,
+            Email.received_at
+        ).filter(Email.user_id == current_user_id)
         
         # Apply filters
         if priority:
-            query = query.filter_by(priority=priority)
+            query = query.filter(Email.priority == priority)
         
         if read_status is not None:
             is_read = read_status.lower() == 'true'
-            query = query.filter_by(read=is_read)
+            query = query.filter(Email.read == is_read)
         
         if search:
             search_term = f"%{search}%"
@@ -56,45 +83,67 @@ def get_emails(current_user_id):
                 )
             )
         
-        # Order by timestamp (newest first)
-        query = query.order_by(Email.received_at.desc())
+        # Totals require a full COUNT over the matching rows, so only
+        # compute them when explicitly requested
+        total = query.order_by(None).count() if include_count else None
+        
+        # Seek past the last row of the previous page (newest first)
+        if cursor:
+            query = query.filter(
+                tuple_(Email.received_at, Email.id) < (cursor_ts, cursor_id)
+            )
+        
+        rows = query.order_by(
+            Email.received_at.desc(),
+            Email.id.desc()
+        ).limit(per_page + 1).all()
         
-        # Paginate
-        pagination = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        next_cursor = _encode_cursor(rows[-1]) if has_next else None
         
         # Format response
         emails = [{
             'id': email.id,
             'sender': email.sender,
             'subject': email.subject,
-            'body': email.body,
+            'preview': email.preview,
             'priority': email.priority,
             'read': email.read,
             'timestamp': email.received_at.isoformat(),
-        } for email in pagination.items]
+        } for email in rows]
+        
+        pagination = {
+            'per_page': per_page,
+            'next_cursor': next_cursor,
+            'has_next': has_next
+        }
+        if include_count:
+            pagination['total'] = total
         
         return jsonify({
             'emails': emails,
-            'pagination': {
-                'page': pagination.page,
-                'per_page': pagination.per_page,
-                'total': pagination.total,
-                'pages': pagination.pages,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
+            'pagination': pagination
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _encode_cursor(email):
+    """Build an opaque pagination cursor from the last email on a page"""
+    raw = f"{email.received_at.isoformat()}:{email.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    """Parse a pagination cursor into (received_at, id); raises ValueError"""
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    timestamp, email_id = raw.rsplit(':', 1)
+    return datetime.fromisoformat(timestamp), int(email_id)
+
+
 @email_bp.route('/emails/<int:email_id>', methods=['GET'])
-@jwt_required()
 @token_required
 def get_email(current_user_id, email_id):
     """Get a specific email by ID"""
@@ -107,10 +156,12 @@ def get_email(current_user_id, email_id):
         if not email:
             return jsonify({'error': 'Email not found'}), 404
         
-        # Mark as read when accessed
+        # Mark as read when accessed - the write is queued and batched in
+        # the background, the response reports the read state optimistically
         if not email.read:
-            email.read = True
-            db.session.commit()
+            enqueue_mark_read(
+                current_app._get_current_object(), email.id, current_user_id
+            )
         
         return jsonify({
             'id': email.id,
@@ -118,7 +169,7 @@ def get_email(current_user_id, email_id):
             'subject': email.subject,
             'body': email.body,
             'priority': email.priority,
-            'read': email.read,
+            'read': True,
             'timestamp': email.received_at.isoformat(),
         }), 200
         
@@ -127,7 +178,6 @@ def get_email(current_user_id, email_id):
 
 
 @email_bp.route('/emails/<int:email_id>/read', methods=['PATCH'])
-@jwt_required()
 @token_required
 def mark_email_read(current_user_id, email_id):
     """Mark an email as read or unread"""
@@ -158,7 +208,6 @@ def mark_email_read(current_user_id, email_id):
 
 
 @email_bp.route('/emails/<int:email_id>', methods=['DELETE'])
-@jwt_required()
 @token_required
 def delete_email(current_user_id, email_id):
     """Delete an email"""
@@ -185,7 +234,6 @@ def delete_email(current_user_id, email_id):
 
 
 @email_bp.route('/emails/stats', methods=['GET'])
-@jwt_required()
 @token_required
 def get_email_stats(current_user_id):
     """Get email statistics for current user"""
@@ -209,17 +257,16 @@ def get_email_stats(current_user_id):
 
 
 @email_bp.route('/emails/bulk/read', methods=['PATCH'])
-@jwt_required()
 @token_required
 def bulk_mark_read(current_user_id):
     """Mark multiple emails as read"""
     try:
-        data = request.get_json()
-        email_ids = data.get('email_ids', [])
+        data = request.get_json() or {}
         read_status = data.get('read', True)
         
-        if not email_ids:
-            return jsonify({'error': 'No email IDs provided'}), 400
+        email_ids, error = _parse_email_ids(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         # Update emails
         Email.query.filter(
@@ -242,16 +289,15 @@ def bulk_mark_read(current_user_id):
 
 
 @email_bp.route('/emails/bulk/delete', methods=['DELETE'])
-@jwt_required()
 @token_required
 def bulk_delete_emails(current_user_id):
     """Delete multiple emails"""
     try:
-        data = request.get_json()
-        email_ids = data.get('email_ids', [])
+        data = request.get_json() or {}
         
-        if not email_ids:
-            return jsonify({'error': 'No email IDs provided'}), 400
+        email_ids, error = _parse_email_ids(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         # Delete emails
         deleted = Email.query.filter(
@@ -272,3 +318,26 @@ def bulk_delete_emails(current_user_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+
+def _parse_email_ids(data):
+    """
+    Validate the email_ids list of a bulk request
+    
+    Returns (ids, error) where ids is a de-duplicated list of ints and
+    error is a message when the payload is missing, malformed or too large.
+    """
+    email_ids = data.get('email_ids', [])
+    
+    if not email_ids:
+        return None, 'No email IDs provided'
+    
+    if not isinstance(email_ids, list):
+        return None, 'email_ids must be a list'
+    
+    if len(email_ids) > MAX_BULK_EMAIL_IDS:
+        return None, f'Too many email IDs (max {MAX_BULK_EMAIL_IDS})'
+    
+    if not all(isinstance(i, int) and not isinstance(i, bool) for i in email_ids):
+        return None, 'email_ids must contain integers'
+    
+    return list(dict.fromkeys(email_ids)), None
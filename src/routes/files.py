@@ -2,30 +2,47 @@
 File Storage Routes
 Handles file upload, download, preview, and AI integration
 """
-from flask import Blueprint, request, jsonify, send_file, send_from_directory
-from werkzeug.utils import secure_filename
+from flask import Blueprint, request, jsonify, send_file, send_from_directory, current_app, Response, stream_with_context
+from werkzeug.utils import secure_filename, send_file as werkzeug_send_file
+from werkzeug.exceptions import RequestEntityTooLarge
+from sqlalchemy.orm import defer
 import os
 import mimetypes
+import uuid
 import hashlib
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import magic  # python-magic for file type detection
 from PIL import Image
 import PyPDF2
 import docx
+try:
+    import fitz  # PyMuPDF - optional, much faster PDF text extraction
+except ImportError:
+    fitz = None
 import json
+import requests
 
 from ..models.models import db, File, User
 from ..middleware.auth import token_required, optional_token
 from ..utils.validation import validate_request, FileUploadSchema
 from ..utils.errors import APIError
 from ..services.document_parsers import DocumentParserService
+from ..services.ai_providers.base import create_http_session
+from ..services.job_queue import submit_job, job_result_response
+from ..services.file_access_queue import record_access
 
 files_bp = Blueprint('files', __name__)
 
 # Configuration
 UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
 MAX_FILE_SIZE = int(os.getenv('MAX_FILE_SIZE', 50 * 1024 * 1024))  # 50MB default
+MULTIPART_OVERHEAD = 64 * 1024  # Boundaries and form fields around a single upload
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Request stream read size while saving uploads
+EXTRACTED_TEXT_LIMIT = 10000  # Characters of text kept for AI processing
 ALLOWED_EXTENSIONS = {
     'images': {'png', 'jpg', 'jpeg', 'gif', 'webp', 'svg'},
     'documents': {'pdf', 'doc', 'docx', 'txt', 'md', 'rtf'},
@@ -36,41 +53,215 @@ ALLOWED_EXTENSIONS = {
     'media': {'mp3', 'mp4', 'wav', 'avi', 'mov'}
 }
 
+# Flat extension -> category lookup derived from ALLOWED_EXTENSIONS
+EXT_TO_CATEGORY = {
+    ext: category
+    for category, extensions in ALLOWED_EXTENSIONS.items()
+    for ext in extensions
+}
+
+# Image extensions Pillow cannot rasterize (no thumbnail is generated)
+NON_RASTER_IMAGE_EXTENSIONS = ('.svg',)
+
+# Leading bytes of an upload handed to libmagic for MIME detection
+MIME_SNIFF_LENGTH = 2048
+
+# libmagic results too vague to win over the extension-based type
+GENERIC_MIME_TYPES = {'application/octet-stream', 'text/plain', 'application/zip'}
+
+# Maximum worker threads for per-file processing in bulk uploads
+BULK_UPLOAD_WORKERS = 8
+
+# Pooled HTTP client for AI analysis calls
+_ai_session = create_http_session()
+
+# Load the libmagic database and the mimetypes registry once at import
+# rather than on the first upload
+_MAGIC = magic.Magic(mime=True)
+mimetypes.init()
+
 # Ensure upload directory exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(os.path.join(UPLOAD_FOLDER, 'thumbnails'), exist_ok=True)
 
 
+def _file_extension(filename):
+    """Lower-cased extension of filename without the dot ('' if none)"""
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
-    if '.' not in filename:
-        return False
-    ext = filename.rsplit('.', 1)[1].lower()
-    return any(ext in exts for exts in ALLOWED_EXTENSIONS.values())
+    return _file_extension(filename) in EXT_TO_CATEGORY
 
 
 def get_file_category(filename):
     """Determine file category based on extension"""
-    ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
-    for category, extensions in ALLOWED_EXTENSIONS.items():
-        if ext in extensions:
-            return category
-    return 'other'
+    return EXT_TO_CATEGORY.get(_file_extension(filename), 'other')
+
 
+@lru_cache(maxsize=None)
+def guess_mime_type(ext):
+    """MIME type for a file extension such as '.pdf' (cached per extension)"""
+    return mimetypes.guess_type(f"file{ext.lower()}")[0] or 'application/octet-stream'
 
-def calculate_file_hash(file_path):
-    """Calculate SHA256 hash of file"""
+
+def detect_mime_type(head, ext):
+    """
+    Detect a file's MIME type from its leading bytes
+    
+    libmagic only sees the first MIME_SNIFF_LENGTH bytes, so generic
+    answers (plain text, zip containers such as .xlsx) defer to the
+    extension when it maps to something more specific.
+    """
+    try:
+        sniffed = _MAGIC.from_buffer(head) if head else None
+    except Exception:
+        sniffed = None
+    
+    if sniffed and sniffed not in GENERIC_MIME_TYPES:
+        return sniffed
+    
+    guessed = guess_mime_type(ext)
+    if guessed != 'application/octet-stream':
+        return guessed
+    return sniffed or guessed
+
+
+def save_upload(file, file_path):
+    """
+    Write an uploaded file to disk, hashing it on the way through
+    
+    Each chunk is read once from the request stream into a reused buffer,
+    fed to SHA256 and written out, so the saved file does not need to be
+    re-read for hashing.
+    
+    Returns:
+        (file_size, sha256 hex digest, leading bytes for MIME sniffing)
+        
+    Raises:
+        APIError: If the upload exceeds MAX_FILE_SIZE (the partial file is removed)
+    """
     sha256_hash = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+    file_size = 0
+    head = b''
+    buffer = bytearray(UPLOAD_CHUNK_SIZE)
+    view = memoryview(buffer)
+    
+    with open(file_path, 'wb') as out:
+        while True:
+            size = file.stream.readinto(buffer)
+            if not size:
+                break
+            
+            file_size += size
+            if file_size > MAX_FILE_SIZE:
+                break
+            
+            if len(head) < MIME_SNIFF_LENGTH:
+                head += bytes(view[:min(size, MIME_SNIFF_LENGTH - len(head))])
+            
+            sha256_hash.update(view[:size])
+            out.write(view[:size])
+    
+    if file_size > MAX_FILE_SIZE:
+        os.remove(file_path)
+        raise APIError(f'File too large. Maximum size is {MAX_FILE_SIZE / (1024*1024)}MB', 400)
+    
+    return file_size, sha256_hash.hexdigest(), head
+
+
+def find_stored_duplicate(file_hash):
+    """Return an existing file record with this content whose blob is still on disk"""
+    for existing in File.query.filter_by(file_hash=file_hash).all():
+        if os.path.exists(os.path.join(UPLOAD_FOLDER, existing.file_path)):
+            return existing
+    return None
+
+
+def _is_shared(column, value, file_id):
+    """Check whether another file record references the same stored path"""
+    return db.session.query(
+        File.query.filter(column == value, File.id != file_id).exists()
+    ).scalar()
+
+
+def send_stored_file(relative_path, **kwargs):
+    """
+    Send a file stored under UPLOAD_FOLDER
+    
+    When X_ACCEL_REDIRECT_PREFIX is configured the response carries an
+    X-Accel-Redirect header and an empty body, so nginx streams the file
+    from its internal location instead of this process. With Flask's
+    USE_X_SENDFILE the same happens through Apache's X-Sendfile.
+    
+    Args:
+        relative_path: Path relative to UPLOAD_FOLDER
+        **kwargs: Passed through to send_file (mimetype, as_attachment, ...)
+    """
+    file_path = os.path.join(UPLOAD_FOLDER, relative_path)
+    prefix = current_app.config.get('X_ACCEL_REDIRECT_PREFIX')
+    
+    if not prefix:
+        return send_file(file_path, **kwargs)
+    
+    # Let werkzeug build the headers (disposition, etag, conditional
+    # handling) without opening the file, then hand the path to nginx
+    response = werkzeug_send_file(
+        file_path,
+        request.environ,
+        use_x_sendfile=True,
+        response_class=current_app.response_class,
+        **kwargs
+    )
+    del response.headers['X-Sendfile']
+    response.headers['X-Accel-Redirect'] = f"{prefix.rstrip('/')}/{quote(relative_path)}"
+    return response
+
+
+def _prior_extracted_text(file_hash):
+    """Extracted text of an earlier upload with the same content, if any"""
+    prior = db.session.query(File.extracted_text).filter(
+        File.file_hash == file_hash,
+        File.extracted_text.isnot(None)
+    ).first()
+    return prior.extracted_text if prior else None
+
+
+def process_saved_file(file_path, unique_filename, category, file_ext, extract_text=True):
+    """
+    Derive the thumbnail and AI text for a newly stored upload
+    
+    Touches only the filesystem (no database access), so it is safe to
+    run from worker threads.
+    
+    Returns:
+        (thumbnail path relative to UPLOAD_FOLDER or None, extracted text or None)
+    """
+    # Generate thumbnail for images
+    thumbnail_path = None
+    if category == 'images':
+        thumbnail_filename = f"thumb_{unique_filename}.png"
+        thumbnail_full_path = os.path.join(UPLOAD_FOLDER, 'thumbnails', thumbnail_filename)
+        if generate_thumbnail(file_path, thumbnail_full_path):
+            thumbnail_path = f"thumbnails/{thumbnail_filename}"
+    
+    extracted_text = extract_text_from_file(file_path, file_ext) if extract_text else None
+    
+    return thumbnail_path, extracted_text
 
 
 def generate_thumbnail(file_path, thumbnail_path, size=(200, 200)):
     """Generate thumbnail for image files"""
+    # Vector images cannot be decoded by Pillow
+    if file_path.lower().endswith(NON_RASTER_IMAGE_EXTENSIONS):
+        return False
+    
     try:
         with Image.open(file_path) as img:
+            # thumbnail() resizes in place and lets JPEG decode at reduced
+            # scale (draft mode); avoid load()/copy() before it, which would
+            # force a full-resolution decode
             img.thumbnail(size, Image.Resampling.LANCZOS)
             img.save(thumbnail_path, 'PNG')
             return True
@@ -79,20 +270,54 @@ def generate_thumbnail(file_path, thumbnail_path, size=(200, 200)):
         return False
 
 
+def extract_pdf_text(file_path, limit=EXTRACTED_TEXT_LIMIT):
+    """
+    Extract up to `limit` characters of text from a PDF
+    
+    Pages are read in order and extraction stops once the budget is filled.
+    Uses PyMuPDF when installed, PyPDF2 otherwise.
+    """
+    page_texts = []
+    total = 0
+    
+    if fitz is not None:
+        with fitz.open(file_path) as doc:
+            for page in doc:
+                page_text = page.get_text()
+                page_texts.append(page_text)
+                total += len(page_text)
+                if total >= limit:
+                    break
+    else:
+        with open(file_path, 'rb') as f:
+            for page in PyPDF2.PdfReader(f).pages:
+                page_text = page.extract_text() or ''
+                page_texts.append(page_text)
+                total += len(page_text)
+                if total >= limit:
+                    break
+    
+    return '\n\n'.join(page_texts)[:limit]
+
+
 def extract_text_from_file(file_path, file_type):
     """Extract text content from various file types for AI processing"""
     try:
+        # PDFs only need the leading text, so skip the full document parse
+        if file_type.lower() == 'pdf':
+            return extract_pdf_text(file_path)
+        
         # Use new document parser service for office documents
         file_ext = f'.{file_type}'
         if DocumentParserService.is_supported(file_ext):
             parsed_data = DocumentParserService.parse_document(file_path, file_ext)
             if parsed_data.get('success'):
-                return parsed_data.get('text', '')[:10000]
+                return parsed_data.get('text', '')[:EXTRACTED_TEXT_LIMIT]
         
         # Fallback for other text files
         if file_type in ['txt', 'md', 'json', 'xml', 'yaml', 'yml', 'py', 'js', 'html', 'css']:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                return f.read()[:10000]
+                return f.read(EXTRACTED_TEXT_LIMIT)
         
         return None
     except Exception as e:
@@ -105,6 +330,13 @@ def extract_text_from_file(file_path, file_type):
 def upload_file(current_user_id=None):
     """Upload a file to the server"""
     try:
+        # Reject oversized bodies before werkzeug parses (and spools) the
+        # multipart form; the limit also covers bodies without Content-Length
+        max_body_size = MAX_FILE_SIZE + MULTIPART_OVERHEAD
+        if request.content_length and request.content_length > max_body_size:
+            raise APIError(f'File too large. Maximum size is {MAX_FILE_SIZE / (1024*1024)}MB', 413)
+        request.max_content_length = max_body_size
+        
         # Check if file is present
         if 'file' not in request.files:
             raise APIError('No file provided', 400)
@@ -130,31 +362,35 @@ def upload_file(current_user_id=None):
         name, ext = os.path.splitext(filename)
         unique_filename = f"{name}_{timestamp}_{current_user_id}{ext}"
         
-        # Save file
+        # Save file, hashing it while it is written
         file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
-        file.save(file_path)
-        
-        # Get file info
-        file_size = os.path.getsize(file_path)
-        
-        if file_size > MAX_FILE_SIZE:
-            os.remove(file_path)
-            raise APIError(f'File too large. Maximum size is {MAX_FILE_SIZE / (1024*1024)}MB', 400)
+        file_size, file_hash, head = save_upload(file, file_path)
         
-        file_hash = calculate_file_hash(file_path)
-        mime_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+        mime_type = detect_mime_type(head, ext)
         category = get_file_category(filename)
         
-        # Generate thumbnail for images
-        thumbnail_path = None
-        if category == 'images':
-            thumbnail_filename = f"thumb_{unique_filename}.png"
-            thumbnail_full_path = os.path.join(UPLOAD_FOLDER, 'thumbnails', thumbnail_filename)
-            if generate_thumbnail(file_path, thumbnail_full_path):
-                thumbnail_path = f"thumbnails/{thumbnail_filename}"
-        
-        # Extract text for AI processing
-        extracted_text = extract_text_from_file(file_path, ext[1:])
+        existing = find_stored_duplicate(file_hash)
+        if existing:
+            # Identical content is already stored - point at that blob and
+            # reuse its derived data instead of keeping a second copy
+            os.remove(file_path)
+            unique_filename = existing.file_path
+            thumbnail_path = existing.thumbnail_path
+            extracted_text = existing.extracted_text
+            if extracted_text is None:
+                extracted_text = extract_text_from_file(
+                    os.path.join(UPLOAD_FOLDER, unique_filename), ext[1:]
+                )
+        else:
+            # Extract text for AI processing, reusing the text of an identical
+            # earlier upload when there is one
+            prior = _prior_extracted_text(file_hash)
+            thumbnail_path, extracted_text = process_saved_file(
+                file_path, unique_filename, category, ext[1:],
+                extract_text=prior is None
+            )
+            if prior is not None:
+                extracted_text = prior
         
         # Create database record
         file_record = File(
@@ -183,6 +419,8 @@ def upload_file(current_user_id=None):
         
     except APIError as e:
         raise e
+    except RequestEntityTooLarge:
+        raise APIError(f'File too large. Maximum size is {MAX_FILE_SIZE / (1024*1024)}MB', 413)
     except Exception as e:
         raise APIError(f'Error uploading file: {str(e)}', 500)
 
@@ -198,8 +436,15 @@ def list_files(current_user_id=None):
         task_id = request.args.get('task_id', type=int)
         search = request.args.get('search')
         
-        # Base query - user's files or public files
-        query = File.query.filter(
+        # Base query - user's files or public files. The large text columns
+        # are deferred; listings only need to know whether text exists
+        query = db.session.query(
+            File,
+            File.extracted_text.isnot(None).label('has_extracted_text')
+        ).options(
+            defer(File.extracted_text),
+            defer(File.parsed_metadata)
+        ).filter(
             (File.uploaded_by == current_user_id) | (File.is_public == True)
         )
         
@@ -223,7 +468,10 @@ def list_files(current_user_id=None):
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
         
         return jsonify({
-            'files': [f.to_dict() for f in pagination.items],
+            'files': [
+                f.to_list_dict(has_extracted_text)
+                for f, has_extracted_text in pagination.items
+            ],
             'total': pagination.total,
             'page': page,
             'per_page': per_page,
@@ -275,13 +523,15 @@ def download_file(file_id, current_user=None):
         if not os.path.exists(file_path):
             raise APIError('File not found on server', 404)
         
-        # Update download count
-        file.download_count += 1
-        file.last_accessed = datetime.utcnow()
-        db.session.commit()
+        # Update download count - queued and applied in batches off the
+        # request path
+        record_access(
+            current_app._get_current_object(), file.id, datetime.utcnow(),
+            download=True
+        )
         
-        return send_file(
-            file_path,
+        return send_stored_file(
+            file.file_path,
             as_attachment=True,
             download_name=file.original_filename,
             mimetype=file.mime_type
@@ -312,12 +562,11 @@ def preview_file(file_id, current_user=None):
         if not os.path.exists(file_path):
             raise APIError('File not found on server', 404)
         
-        # Update access tracking
-        file.last_accessed = datetime.utcnow()
-        db.session.commit()
+        # Update access tracking (batched in the background)
+        record_access(current_app._get_current_object(), file.id, datetime.utcnow())
         
-        return send_file(
-            file_path,
+        return send_stored_file(
+            file.file_path,
             mimetype=file.mime_type
         )
         
@@ -341,7 +590,7 @@ def get_thumbnail(file_id):
         if not os.path.exists(thumbnail_path):
             raise APIError('Thumbnail not found on server', 404)
         
-        return send_file(thumbnail_path, mimetype='image/png')
+        return send_stored_file(file.thumbnail_path, mimetype='image/png')
         
     except APIError as e:
         raise e
@@ -363,13 +612,13 @@ def delete_file(file_id, current_user_id=None):
         if file.uploaded_by != current_user_id:
             raise APIError('You do not have permission to delete this file', 403)
         
-        # Delete physical file
+        # Delete physical file unless another record shares the same blob
         file_path = os.path.join(UPLOAD_FOLDER, file.file_path)
-        if os.path.exists(file_path):
+        if os.path.exists(file_path) and not _is_shared(File.file_path, file.file_path, file.id):
             os.remove(file_path)
         
         # Delete thumbnail if exists
-        if file.thumbnail_path:
+        if file.thumbnail_path and not _is_shared(File.thumbnail_path, file.thumbnail_path, file.id):
             thumbnail_path = os.path.join(UPLOAD_FOLDER, file.thumbnail_path)
             if os.path.exists(thumbnail_path):
                 os.remove(thumbnail_path)
@@ -389,7 +638,15 @@ def delete_file(file_id, current_user_id=None):
 @files_bp.route('/<int:file_id>/ai-analyze', methods=['POST'])
 @token_required
 def ai_analyze_file(file_id, current_user_id=None):
-    """Use AI to analyze file content"""
+    """
+    Use AI to analyze file content
+    
+    The AI call runs in the background; poll the returned task_id at
+    GET /api/files/ai-analyze/result/<task_id> (results are held in the
+    accepting process; see services/job_queue). With "stream": true in the
+    body the generated text is instead streamed back as plain text while
+    the model produces it.
+    """
     try:
         file = File.query.get(file_id)
         
@@ -404,14 +661,9 @@ def ai_analyze_file(file_id, current_user_id=None):
             raise APIError('File content cannot be analyzed (no text extracted)', 400)
         
         # Get analysis type from request
-        data = request.get_json() or {}
+        data = request.get_json(silent=True) or {}
         analysis_type = data.get('type', 'summary')  # summary, keywords, sentiment, etc.
         
-        # Prepare AI request
-        import requests
-        ai_api_url = os.getenv('AI_API_URL', 'http://localhost:11434/api/generate')
-        ai_model = os.getenv('AI_MODEL', 'phi3')
-        
         prompts = {
             'summary': f"Summarize the following document in 3-5 sentences:\n\n{file.extracted_text}",
             'keywords': f"Extract the top 10 keywords from this document:\n\n{file.extracted_text}",
@@ -421,30 +673,24 @@ def ai_analyze_file(file_id, current_user_id=None):
         
         prompt = prompts.get(analysis_type, prompts['summary'])
         
-        # Call AI API with proper error handling
-        try:
-            response = requests.post(
-                ai_api_url,
-                json={'model': ai_model, 'prompt': prompt, 'stream': False},
-                timeout=30
+        if data.get('stream'):
+            return Response(
+                stream_with_context(_stream_ai_analysis(prompt)),
+                mimetype='text/plain'
             )
-            response.raise_for_status()
-            ai_response = response.json().get('response', 'No response from AI')
-        except requests.exceptions.Timeout:
-            ai_response = "AI analysis timed out. Please try again."
-        except requests.exceptions.ConnectionError:
-            ai_response = "AI service unavailable. Please ensure Ollama is running."
-        except requests.exceptions.HTTPError as e:
-            ai_response = f"AI service error: {e.response.status_code}"
-        except requests.exceptions.RequestException as e:
-            ai_response = f"AI analysis failed: {str(e)}"
+        
+        task_id = submit_job(
+            current_app._get_current_object(),
+            current_user_id,
+            _run_ai_analysis,
+            file_id, file.filename, analysis_type, prompt
+        )
         
         return jsonify({
-            'file_id': file_id,
-            'filename': file.filename,
-            'analysis_type': analysis_type,
-            'result': ai_response
-        }), 200
+            'task_id': task_id,
+            'status': 'pending',
+            'file_id': file_id
+        }), 202
         
     except APIError as e:
         raise e
@@ -452,6 +698,70 @@ def ai_analyze_file(file_id, current_user_id=None):
         raise APIError(f'Error analyzing file: {str(e)}', 500)
 
 
+def _run_ai_analysis(file_id, filename, analysis_type, prompt):
+    """Call the AI API for a file analysis (background job)"""
+    ai_api_url = os.getenv('AI_API_URL', 'http://localhost:11434/api/generate')
+    ai_model = os.getenv('AI_MODEL', 'phi3')
+    
+    # Call AI API with proper error handling
+    try:
+        response = _ai_session.post(
+            ai_api_url,
+            json={'model': ai_model, 'prompt': prompt, 'stream': False},
+            timeout=30
+        )
+        response.raise_for_status()
+        ai_response = response.json().get('response', 'No response from AI')
+    except requests.exceptions.Timeout:
+        ai_response = "AI analysis timed out. Please try again."
+    except requests.exceptions.ConnectionError:
+        ai_response = "AI service unavailable. Please ensure Ollama is running."
+    except requests.exceptions.HTTPError as e:
+        ai_response = f"AI service error: {e.response.status_code}"
+    except requests.exceptions.RequestException as e:
+        ai_response = f"AI analysis failed: {str(e)}"
+    
+    return {
+        'file_id': file_id,
+        'filename': filename,
+        'analysis_type': analysis_type,
+        'result': ai_response
+    }
+
+
+def _stream_ai_analysis(prompt):
+    """Yield the AI analysis text chunk by chunk as the model generates it"""
+    ai_api_url = os.getenv('AI_API_URL', 'http://localhost:11434/api/generate')
+    ai_model = os.getenv('AI_MODEL', 'phi3')
+    
+    try:
+        with _ai_session.post(
+            ai_api_url,
+            json={'model': ai_model, 'prompt': prompt, 'stream': True},
+            stream=True,
+            timeout=30
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line).get('response', '')
+    except requests.exceptions.Timeout:
+        yield "AI analysis timed out. Please try again."
+    except requests.exceptions.ConnectionError:
+        yield "AI service unavailable. Please ensure Ollama is running."
+    except requests.exceptions.HTTPError as e:
+        yield f"AI service error: {e.response.status_code}"
+    except requests.exceptions.RequestException as e:
+        yield f"AI analysis failed: {str(e)}"
+
+
+@files_bp.route('/ai-analyze/result/<task_id>', methods=['GET'])
+@token_required
+def get_ai_analysis_result(task_id, current_user_id=None):
+    """Poll the result of a background file analysis"""
+    return job_result_response(task_id, current_user_id)
+
+
 @files_bp.route('/bulk-upload', methods=['POST'])
 @token_required
 def bulk_upload(current_user_id=None):
@@ -461,9 +771,17 @@ def bulk_upload(current_user_id=None):
             raise APIError('No files provided', 400)
         
         files = request.files.getlist('files')
-        uploaded_files = []
+        file_records = []
+        pending = []  # Newly stored files still needing thumbnail/text work
+        shared = []  # Files reusing the blob of an already stored upload
+        batch_by_hash = {}  # Records of this batch keyed by content hash
         errors = []
         
+        # One timestamp for the whole batch; a random suffix keeps names
+        # unique when the same filename appears more than once
+        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        
+        # Request bodies are read sequentially, so files are saved in order
         for file in files:
             try:
                 if file.filename == '' or not allowed_file(file.filename):
@@ -472,21 +790,25 @@ def bulk_upload(current_user_id=None):
                 
                 # Process each file (similar to single upload)
                 filename = secure_filename(file.filename)
-                timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
                 name, ext = os.path.splitext(filename)
-                unique_filename = f"{name}_{timestamp}_{current_user_id}{ext}"
+                unique_filename = f"{name}_{timestamp}_{uuid.uuid4().hex[:8]}_{current_user_id}{ext}"
                 
                 file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
-                file.save(file_path)
-                
-                file_size = os.path.getsize(file_path)
-                if file_size > MAX_FILE_SIZE:
-                    os.remove(file_path)
+                try:
+                    file_size, file_hash, head = save_upload(file, file_path)
+                except APIError:
                     errors.append(f"{filename}: File too large")
                     continue
                 
-                file_hash = calculate_file_hash(file_path)
-                mime_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+                # Share the blob of identical content that is already stored,
+                # either earlier in this batch or by a previous upload (records
+                # are only inserted at the end, so the batch is checked first)
+                existing = batch_by_hash.get(file_hash) or find_stored_duplicate(file_hash)
+                if existing:
+                    os.remove(file_path)
+                    unique_filename = existing.file_path
+                
+                mime_type = detect_mime_type(head, ext)
                 category = get_file_category(filename)
                 
                 file_record = File(
@@ -500,13 +822,46 @@ def bulk_upload(current_user_id=None):
                     uploaded_by=current_user_id
                 )
                 
-                db.session.add(file_record)
-                uploaded_files.append(file_record.to_dict())
+                if existing:
+                    # The original may be earlier in this same batch, so its
+                    # derived fields are copied once processing has finished
+                    shared.append((file_record, existing))
+                else:
+                    prior = _prior_extracted_text(file_hash)
+                    file_record.extracted_text = prior
+                    pending.append((
+                        file_record,
+                        (file_path, unique_filename, category, ext[1:], prior is None)
+                    ))
+                
+                batch_by_hash.setdefault(file_hash, file_record)
+                file_records.append(file_record)
                 
             except Exception as e:
                 errors.append(f"{file.filename}: {str(e)}")
         
+        # Thumbnails and text extraction are independent per file; run them
+        # concurrently and apply the results on this thread's session
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(BULK_UPLOAD_WORKERS, len(pending))) as executor:
+                results = list(executor.map(
+                    lambda item: process_saved_file(*item[1][:4], extract_text=item[1][4]),
+                    pending
+                ))
+            for (file_record, _), (thumbnail_path, extracted_text) in zip(pending, results):
+                file_record.thumbnail_path = thumbnail_path
+                if extracted_text is not None:
+                    file_record.extracted_text = extracted_text
+        
+        for file_record, existing in shared:
+            file_record.thumbnail_path = existing.thumbnail_path
+            file_record.extracted_text = existing.extracted_text
+        
+        # Add all records at once so the flush batches them into a
+        # multi-row INSERT (which still returns the generated ids)
+        db.session.add_all(file_records)
         db.session.commit()
+        uploaded_files = [file_record.to_dict() for file_record in file_records]
         
         return jsonify({
             'message': f'Uploaded {len(uploaded_files)} files',
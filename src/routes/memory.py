@@ -5,16 +5,14 @@ API endpoints for managing AI memory and context
 
 from flask import Blueprint, request, jsonify
 from datetime import datetime
+from sqlalchemy import delete
 from src.middleware.auth import token_required
-from src.services.ai_service import AIService
+from src.services.ai_service import get_ai_service
+from src.services.memory_service import MemoryService
 from src.utils.errors import APIError
 
 memory_bp = Blueprint('memory', __name__)
 
-def get_ai_service(current_user_id=None):
-    """Get AI service instance"""
-    return AIService()
-
 
 @memory_bp.route('/history', methods=['GET'])
 @token_required
@@ -188,20 +186,13 @@ def export_memories(current_user_id=None):
     try:
         user_id = current_user_id
         
-        # Get all data
-        ai_service = get_ai_service()
-        memories = ai_service.get_user_memories(user_id)
-        ai_service = get_ai_service()
-        history = ai_service.get_conversation_history(user_id, limit=1000)
-        ai_service = get_ai_service()
-        stats = ai_service.get_memory_stats(user_id)
+        # Get all data - only the memory store is needed, not an AI provider
+        data = MemoryService().export_user_data(user_id, history_limit=1000)
         
         export_data = {
             'user_id': user_id,
             'exported_at': datetime.utcnow().isoformat(),
-            'memories': memories,
-            'conversation_history': history,
-            'statistics': stats
+            **data
         }
         
         return jsonify({
@@ -220,12 +211,16 @@ def clear_all_data(current_user_id=None):
     try:
         user_id = current_user_id
         
-        # Clear all conversations
+        # Clear all conversations, memories and summaries in one transaction.
+        # Plain bulk DELETEs (each backed by the table's user_id index) skip
+        # reconciling the session's identity map row by row
         from src.models.models import db, ConversationHistory, UserMemory, ContextSummary
         
-        ConversationHistory.query.filter_by(user_id=user_id).delete()
-        UserMemory.query.filter_by(user_id=user_id).delete()
-        ContextSummary.query.filter_by(user_id=user_id).delete()
+        for model in (ConversationHistory, UserMemory, ContextSummary):
+            db.session.execute(
+                delete(model).where(model.user_id == user_id),
+                execution_options={'synchronize_session': False}
+            )
         
         db.session.commit()
         
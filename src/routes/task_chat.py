@@ -2,22 +2,35 @@
 Task Group Chat Routes
 Handles group chat functionality for task boards
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g, current_app
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
-from sqlalchemy import or_
+from sqlalchemy import or_, and_, insert, select, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import joinedload
 
-from ..models.models import db, User, Task
+from ..models.models import db, User, Task, utcnow
 from ..models.chat_models import TaskChat, ChatMessage, ChatParticipant
 from ..middleware.auth import token_required
 from ..utils.errors import APIError, NotFoundError, AuthorizationError
 from ..utils.validation import sanitize_string
+from ..services.chat_read_queue import record_read
 
 task_chat_bp = Blueprint('task_chat', __name__)
 
 
+@task_chat_bp.before_request
+def _reset_access_caches():
+    """
+    Start every request with empty access caches, even when an outer app
+    context (and so ``g``) outlives individual requests
+    """
+    g.pop('chat_access', None)
+    g.pop('task_access_cache', None)
+
+
 @task_chat_bp.route('/tasks/<int:task_id>/chat', methods=['POST', 'GET'])
 @token_required
 def get_or_create_chat(task_id, current_user_id=None):
@@ -27,8 +40,10 @@ def get_or_create_chat(task_id, current_user_id=None):
     POST/GET /api/tasks/1/chat
     Headers: Authorization: Bearer <token>
     """
+    # Load task, chat and the user's participation in one query
+    task, chat, participant = _load_chat_access(task_id, current_user_id)
+    
     # Verify task exists
-    task = Task.query.get(task_id)
     if not task:
         raise NotFoundError('Task not found')
     
@@ -36,23 +51,22 @@ def get_or_create_chat(task_id, current_user_id=None):
     if not _user_has_task_access(current_user_id, task):
         raise AuthorizationError('You do not have access to this task')
     
-    # Get or create chat
-    chat = TaskChat.query.filter_by(task_id=task_id).first()
-    
     if not chat:
-        # Create new chat
+        # Create new chat with all task participants (including the
+        # current user) in a single transaction
         chat = TaskChat(task_id=task_id)
         db.session.add(chat)
-        db.session.commit()
+        db.session.flush()
         
-        # Add task participants to chat
-        _add_task_participants_to_chat(chat, task)
+        participant_count = _add_task_participants_to_chat(chat, task, current_user_id)
+        return jsonify(chat.to_dict(message_count=0, participant_count=participant_count)), 200
     
     # Ensure current user is a participant
-    participant = ChatParticipant.query.filter_by(
-        chat_id=chat.id,
-        user_id=current_user_id
-    ).first()
+    if not participant:
+        participant = ChatParticipant.query.filter_by(
+            chat_id=chat.id,
+            user_id=current_user_id
+        ).first()
     
     if not participant:
         participant = ChatParticipant(
@@ -70,52 +84,46 @@ def get_or_create_chat(task_id, current_user_id=None):
 @token_required
 def get_messages(task_id, current_user_id=None):
     """
-    Get chat messages with pagination
+    Get chat messages, newest first, with cursor pagination
     ---
-    GET /api/tasks/1/chat/messages?page=1&per_page=50&before=<message_id>
+    GET /api/tasks/1/chat/messages?per_page=50&before=<message_id>
     Headers: Authorization: Bearer <token>
+    
+    Pass the returned pagination.next_before as ``before`` to fetch the
+    next (older) page.
     """
     # Verify access
     chat = _get_chat_with_access(task_id, current_user_id)
     
     # Pagination parameters
-    page = request.args.get('page', 1, type=int)
     per_page = min(request.args.get('per_page', 50, type=int), 100)
     before_id = request.args.get('before', type=int)
     
     # Build query
-    query = ChatMessage.query.filter_by(chat_id=chat.id, is_deleted=False)
+    query = ChatMessage.query.options(joinedload(ChatMessage.user)).filter_by(
+        chat_id=chat.id, is_deleted=False
+    )
     
     if before_id:
         query = query.filter(ChatMessage.id < before_id)
     
-    # Order by newest first
-    query = query.order_by(ChatMessage.created_at.desc())
-    
-    # Paginate
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    # Order by newest first; one extra row tells whether an older page exists
+    rows = query.order_by(ChatMessage.id.desc()).limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
     
-    messages = [msg.to_dict() for msg in pagination.items]
+    messages = [msg.to_dict() for msg in rows]
     
-    # Update last_read_at for current user
-    participant = ChatParticipant.query.filter_by(
-        chat_id=chat.id,
-        user_id=current_user_id
-    ).first()
-    
-    if participant:
-        participant.last_read_at = datetime.utcnow()
-        db.session.commit()
+    # Update last_read_at for current user in the background
+    record_read(current_app._get_current_object(), chat.id, current_user_id, datetime.utcnow())
     
     return jsonify({
         'messages': messages,
         'pagination': {
-            'page': page,
             'per_page': per_page,
-            'total': pagination.total,
-            'pages': pagination.pages,
-            'has_next': pagination.has_next,
-            'has_prev': pagination.has_prev
+            'has_next': has_next,
+            'has_prev': before_id is not None,
+            'next_before': rows[-1].id if has_next else None
         }
     }), 200
 
@@ -163,8 +171,8 @@ def send_message(task_id, current_user_id=None):
     
     db.session.add(message)
     
-    # Update chat updated_at
-    chat.updated_at = datetime.utcnow()
+    # Update chat updated_at (set by the database in the same UPDATE)
+    chat.updated_at = utcnow()
     
     db.session.commit()
     
@@ -204,7 +212,7 @@ def edit_message(task_id, message_id, current_user_id=None):
         raise APIError('Message cannot be empty', 400)
     
     message.message = new_message
-    message.edited_at = datetime.utcnow()
+    message.edited_at = utcnow()
     
     db.session.commit()
     
@@ -228,10 +236,7 @@ def delete_message(task_id, message_id, current_user_id=None):
         raise NotFoundError('Message not found')
     
     # Only author can delete (or chat admin)
-    participant = ChatParticipant.query.filter_by(
-        chat_id=chat.id,
-        user_id=current_user_id
-    ).first()
+    _, _, participant = _load_chat_access(task_id, current_user_id)
     
     if message.user_id != current_user_id and participant.role != 'admin':
         raise AuthorizationError('You can only delete your own messages')
@@ -290,38 +295,35 @@ def add_participant(task_id, current_user_id=None):
     if role not in ['admin', 'member', 'viewer']:
         raise APIError('Invalid role', 400)
     
-    # Verify user exists
-    user = User.query.get(user_id)
-    if not user:
-        raise NotFoundError('User not found')
-    
-    # Check if already a participant
-    existing = ChatParticipant.query.filter_by(
-        chat_id=chat.id,
-        user_id=user_id
-    ).first()
-    
-    if existing:
-        if existing.is_active:
-            raise APIError('User is already a participant', 400)
-        else:
-            # Reactivate
-            existing.is_active = True
-            existing.role = role
-            db.session.commit()
-            return jsonify(existing.to_dict()), 200
-    
-    # Add new participant
-    participant = ChatParticipant(
-        chat_id=chat.id,
-        user_id=user_id,
-        role=role
-    )
-    
-    db.session.add(participant)
+    upsert = _upsert_statement(ChatParticipant)
+    if upsert is None:
+        return _add_participant_sequential(chat, user_id, role)
+    
+    # Insert the participant (only if the user exists) or reactivate a
+    # removed one, in a single statement
+    now = datetime.utcnow()
+    stmt = upsert.from_select(
+        ['chat_id', 'user_id', 'role', 'is_active', 'joined_at'],
+        select(
+            literal(chat.id), User.id, literal(role), literal(True), literal(now)
+        ).where(User.id == user_id)
+    ).on_conflict_do_update(
+        index_elements=['chat_id', 'user_id'],
+        set_={'is_active': True, 'role': role},
+        where=ChatParticipant.is_active == False
+    ).returning(ChatParticipant)
+    
+    participant = db.session.execute(stmt).scalar()
     db.session.commit()
     
-    return jsonify(participant.to_dict()), 201
+    if not participant:
+        # Nothing written: either the user doesn't exist or is already active
+        if not db.session.get(User, user_id):
+            raise NotFoundError('User not found')
+        raise APIError('User is already a participant', 400)
+    
+    # A reactivated participant keeps its original joined_at
+    return jsonify(participant.to_dict()), 201 if participant.joined_at == now else 200
 
 
 @task_chat_bp.route('/tasks/<int:task_id>/chat/participants/<int:user_id>', methods=['DELETE'])
@@ -353,46 +355,75 @@ def remove_participant(task_id, user_id, current_user_id=None):
 # Helper functions
 
 def _user_has_task_access(user_id, task):
-    """Check if user has access to the task"""
-    # Check if user has access to task
-    if task.assignee_id == user_id or task.supervisor_id == user_id:
-        return True
-    
-    # Check collaborators (may be stored as strings or objects)
-    if hasattr(task, 'collaborators') and task.collaborators:
-        for c in task.collaborators:
-            if isinstance(c, str):
-                try:
-                    if int(c) == user_id:
-                        return True
-                except (ValueError, TypeError):
-                    logger.debug(f"Exception handled: {str(e)}")
-                    pass
-            elif hasattr(c, 'id') and c.id == user_id:
-                return True
-    
-    return False
+    """
+    Check if user has access to the task
+    
+    The answer is cached on ``g`` per (task_id, user_id) for the rest of
+    the request.
+    """
+    cache = g.setdefault('task_access_cache', {})
+    key = (task.id, user_id)
+    
+    if key not in cache:
+        # Check if user has access to task
+        cache[key] = (
+            task.assignee_id == user_id
+            or task.supervisor_id == user_id
+            or user_id in _task_collaborator_ids(task)
+        )
+    
+    return cache[key]
+
+
+def _task_collaborator_ids(task):
+    """Parse the task's comma-separated collaborators column into user ids"""
+    ids = set()
+    for value in (task.collaborators or '').split(','):
+        try:
+            ids.add(int(value))
+        except ValueError:
+            logger.debug(f"Ignoring invalid collaborator id: {value!r}")
+    return ids
+
+
+def _load_chat_access(task_id, user_id):
+    """
+    Load the task, its chat and the user's active participation in one query
+    
+    The rows are cached on ``g`` per (task_id, user_id) so repeated access
+    checks within a request don't go back to the database.
+    """
+    cache = g.setdefault('chat_access', {})
+    key = (task_id, user_id)
+    
+    if key not in cache:
+        row = db.session.query(Task, TaskChat, ChatParticipant).outerjoin(
+            TaskChat, TaskChat.task_id == Task.id
+        ).outerjoin(
+            ChatParticipant, and_(
+                ChatParticipant.chat_id == TaskChat.id,
+                ChatParticipant.user_id == user_id,
+                ChatParticipant.is_active == True
+            )
+        ).filter(Task.id == task_id).first()
+        
+        cache[key] = tuple(row) if row else (None, None, None)
+    
+    return cache[key]
 
 
 def _get_chat_with_access(task_id, user_id, require_admin=False):
     """Get chat and verify user has access"""
-    task = Task.query.get(task_id)
+    task, chat, participant = _load_chat_access(task_id, user_id)
     if not task:
         raise NotFoundError('Task not found')
     
     if not _user_has_task_access(user_id, task):
         raise AuthorizationError('You do not have access to this task')
     
-    chat = TaskChat.query.filter_by(task_id=task_id).first()
     if not chat:
         raise NotFoundError('Chat not found')
     
-    participant = ChatParticipant.query.filter_by(
-        chat_id=chat.id,
-        user_id=user_id,
-        is_active=True
-    ).first()
-    
     if not participant:
         raise AuthorizationError('You are not a participant in this chat')
     
@@ -402,9 +433,14 @@ def _get_chat_with_access(task_id, user_id, require_admin=False):
     return chat
 
 
-def _add_task_participants_to_chat(chat, task):
-    """Add all task participants to the chat"""
-    participants_to_add = set()
+def _add_task_participants_to_chat(chat, task, current_user_id=None):
+    """
+    Add all task participants (and the requesting user) to the chat
+    
+    Participants are written with a single multi-row INSERT and committed
+    together with the chat itself. Returns the number of participants added.
+    """
+    participants_to_add = _task_collaborator_ids(task)
     
     if task.assignee_id:
         participants_to_add.add(task.assignee_id)
@@ -412,28 +448,65 @@ def _add_task_participants_to_chat(chat, task):
     if task.supervisor_id:
         participants_to_add.add(task.supervisor_id)
     
-    # Handle collaborators (may be stored as strings or objects)
-    if hasattr(task, 'collaborators') and task.collaborators:
-        for collaborator in task.collaborators:
-            if isinstance(collaborator, str):
-                try:
-                    participants_to_add.add(int(collaborator))
-                except (ValueError, TypeError):
-                    logger.debug(f"Exception handled: {str(e)}")
-                    pass
-            elif hasattr(collaborator, 'id'):
-                participants_to_add.add(collaborator.id)
-    
-    for user_id in participants_to_add:
-        # Determine role
-        role = 'admin' if user_id == task.supervisor_id else 'member'
-        
-        participant = ChatParticipant(
-            chat_id=chat.id,
-            user_id=user_id,
-            role=role
-        )
-        db.session.add(participant)
+    if current_user_id:
+        participants_to_add.add(current_user_id)
+    
+    if participants_to_add:
+        db.session.execute(insert(ChatParticipant), [
+            {
+                'chat_id': chat.id,
+                'user_id': user_id,
+                # Determine role
+                'role': 'admin' if user_id == task.supervisor_id else 'member'
+            }
+            for user_id in participants_to_add
+        ])
     
     db.session.commit()
+    return len(participants_to_add)
+
+
+def _upsert_statement(model):
+    """INSERT supporting ON CONFLICT for the current database, or None"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    if dialect == 'sqlite':
+        return sqlite.insert(model)
+    return None
+
 
+def _add_participant_sequential(chat, user_id, role):
+    """Add or reactivate a participant on databases without ON CONFLICT"""
+    # Verify user exists
+    user = User.query.get(user_id)
+    if not user:
+        raise NotFoundError('User not found')
+    
+    # Check if already a participant
+    existing = ChatParticipant.query.filter_by(
+        chat_id=chat.id,
+        user_id=user_id
+    ).first()
+    
+    if existing:
+        if existing.is_active:
+            raise APIError('User is already a participant', 400)
+        else:
+            # Reactivate
+            existing.is_active = True
+            existing.role = role
+            db.session.commit()
+            return jsonify(existing.to_dict()), 200
+    
+    # Add new participant
+    participant = ChatParticipant(
+        chat_id=chat.id,
+        user_id=user_id,
+        role=role
+    )
+    
+    db.session.add(participant)
+    db.session.commit()
+    
+    return jsonify(participant.to_dict()), 201
@@ -1,21 +1,86 @@
 """
 Enhanced Task Instance Routes with Native AI Integration
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import get_jwt_identity
 import os
 import requests
 import json
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from sqlalchemy import update, func
+from sqlalchemy.orm import joinedload
 
 from ..models.models import db, User, File
 from ..models.task_instance import TaskInstance, SubTask, TaskFile, TaskAILog, TaskCollaborator
 from ..middleware.auth import token_required
 from ..utils.errors import APIError, ValidationError
 from ..utils.validation import validate_request, TaskInstanceSchema, SubTaskSchema
+from ..utils.loading import loader_options
+from ..services.ai_providers.base import create_http_session
+from ..services.ai_log_queue import record_interaction
 
 task_instance_bp = Blueprint('task_instance', __name__)
 
+# Pooled HTTP client for task AI calls
+_ai_session = create_http_session(pool_size=20)
+
+# Number of (task_id, detailed) file contexts kept in memory
+FILE_CONTEXT_CACHE_SIZE = 256
+
+# Characters of extracted text included per file in the AI prompt
+FILE_CONTEXT_TEXT_LENGTH = 2000
+FILE_CONTEXT_DETAILED_TEXT_LENGTH = 5000
+
+_file_context_cache = OrderedDict()
+_file_context_lock = threading.Lock()
+
+# Prompt templates for the task AI endpoints
+TASK_CHAT_PROMPT = """You are an AI assistant helping with a specific task.
+
+Task Title: {title}
+Task Description: {description}
+Task Status: {status}
+Task Priority: {priority}
+
+{reference_files}{subtasks}User Question: {message}
+
+Provide a helpful response based on the task context and files."""
+
+TASK_CHAT_SUBTASK_LINE = "- [{status}] {title} (Assigned to: {assignee})\n"
+
+TASK_ANALYZE_PROMPT = """Analyze the following task and its files:
+
+Task: {title}
+Description: {description}
+Status: {status}
+Priority: {priority}
+
+Files:
+{file_context}
+
+Provide:
+1. Summary of the task based on files
+2. Key insights and findings
+3. Potential issues or concerns
+4. Recommendations for next steps
+5. Suggested subtasks to complete this task
+"""
+
+TASK_INIT_PROMPT = """Analyze this new task and provide initial guidance:
+
+Title: {title}
+Description: {description}
+Priority: {priority}
+
+Provide:
+1. Understanding of the task objective
+2. Suggested approach
+3. Potential challenges
+4. Recommended subtasks
+"""
+
 
 @task_instance_bp.route('/task-instances', methods=['POST'])
 @token_required
@@ -43,6 +108,7 @@ def create_task_instance(current_user_id=None):
     # Initialize AI context
     if task.ai_enabled:
         _initialize_ai_context(task)
+        task = TaskInstance.query.get(task.id)
     
     return jsonify({
         'message': 'Task instance created successfully',
@@ -54,19 +120,26 @@ def create_task_instance(current_user_id=None):
 @token_required
 def get_task_instance(task_id, current_user_id=None):
     """Get full task instance with AI logs and subtasks"""
-    user_id = get_jwt_identity()
+    user_id = current_user_id
     
-    task = TaskInstance.query.get_or_404(task_id)
+    task = _get_task_with_users_or_404(task_id)
     
     # Check access
     if not _check_task_access(task, user_id):
         raise APIError('Access denied', 403)
     
     # Get AI logs
-    ai_logs = [log.to_dict() for log in task.ai_logs.order_by(TaskAILog.created_at.desc()).limit(50).all()]
-    
-    task_data = task.to_dict(include_details=True)
-    task_data['ai_logs'] = ai_logs
+    ai_logs = TaskAILog.query.options(*loader_options(
+        joinedload(TaskAILog.user)
+    )).filter_by(task_id=task.id).order_by(TaskAILog.created_at.desc()).limit(50).all()
+    
+    task_data = task.to_dict(
+        include_details=True,
+        subtasks=_load_subtasks(task),
+        task_files=_load_task_files(task),
+        collaborators=_load_collaborators(task)
+    )
+    task_data['ai_logs'] = [log.to_dict() for log in ai_logs]
     
     return jsonify(task_data), 200
 
@@ -74,8 +147,16 @@ def get_task_instance(task_id, current_user_id=None):
 @task_instance_bp.route('/task-instances/<int:task_id>/ai/chat', methods=['POST'])
 @token_required
 def task_ai_chat(task_id, current_user_id=None):
-    """Chat with task-specific AI that has access to task files"""
-    user_id = get_jwt_identity()
+    """
+    Chat with task-specific AI that has access to task files
+    
+    The reply is returned without waiting for its log to be written.
+    With "stream": true in the body the reply is streamed back as
+    newline-delimited JSON ({"response": <chunk>} per line, then a final
+    {"done": true, "log_id": ...} once the log is written) while the model
+    generates it.
+    """
+    user_id = current_user_id
     data = request.get_json()
     
     if not data or 'message' not in data:
@@ -92,56 +173,60 @@ def task_ai_chat(task_id, current_user_id=None):
         raise APIError('AI is not enabled for this task', 400)
     
     # Build context from task files
-    file_context = _build_file_context(task)
+    task_files = _load_prompt_files(task)
+    file_context = _build_file_context(task.id, task_files)
+    
+    # Add subtasks context
+    subtasks = _load_subtasks(task)
+    subtask_lines = ''.join(
+        TASK_CHAT_SUBTASK_LINE.format(
+            status=st.status,
+            title=st.title,
+            assignee=st.assignee.name if st.assignee else "Unassigned"
+        )
+        for st in subtasks
+    )
     
     # Build full prompt with task context
-    full_prompt = f"""You are an AI assistant helping with a specific task.
-
-Task Title: {task.title}
-Task Description: {task.description}
-Task Status: {task.status}
-Task Priority: {task.priority}
-
-"""
+    full_prompt = TASK_CHAT_PROMPT.format(
+        title=task.title,
+        description=task.description,
+        status=task.status,
+        priority=task.priority,
+        reference_files=f"Reference Files:\n{file_context}\n\n" if file_context else "",
+        subtasks=f"Subtasks:\n{subtask_lines}\n" if subtask_lines else "",
+        message=data['message']
+    )
     
-    if file_context:
-        full_prompt += f"Reference Files:\n{file_context}\n\n"
+    files_referenced = json.dumps([f.file_id for f in task_files])
     
-    # Add subtasks context
-    subtasks = task.subtasks.all()
-    if subtasks:
-        full_prompt += "Subtasks:\n"
-        for st in subtasks:
-            assignee_name = st.assignee.name if st.assignee else "Unassigned"
-            full_prompt += f"- [{st.status}] {st.title} (Assigned to: {assignee_name})\n"
-        full_prompt += "\n"
+    # Return the connection to the pool while waiting on the AI service
+    db.session.close()
     
-    full_prompt += f"User Question: {data['message']}\n\nProvide a helpful response based on the task context and files."
+    if data.get('stream'):
+        return Response(
+            stream_with_context(_stream_task_ai_chat(
+                task_id, user_id, data['message'], full_prompt, files_referenced
+            )),
+            mimetype='application/x-ndjson'
+        )
     
     # Call AI
     ai_response = _call_ai(full_prompt)
     
-    # Log the interaction
-    ai_log = TaskAILog(
-        task_id=task.id,
-        user_id=user_id,
-        user_message=data['message'],
-        ai_response=ai_response,
-        files_referenced=json.dumps([f.file_id for f in task.task_files.all()]),
-        action_taken='chat'
-    )
-    db.session.add(ai_log)
-    
-    # Update task AI context
-    task.ai_context = ai_response[:500]  # Store summary
-    task.updated_at = datetime.utcnow()
-    
-    db.session.commit()
+    # Log the interaction in the background
+    record_interaction(current_app._get_current_object(), {
+        'task_id': task_id,
+        'user_id': user_id,
+        'user_message': data['message'],
+        'ai_response': ai_response,
+        'files_referenced': files_referenced,
+        'action_taken': 'chat'
+    }, {'ai_context': ai_response[:500]})  # Store summary
     
     return jsonify({
         'message': data['message'],
-        'response': ai_response,
-        'log_id': ai_log.id
+        'response': ai_response
     }), 200
 
 
@@ -149,7 +234,7 @@ Task Priority: {task.priority}
 @token_required
 def task_ai_analyze(task_id, current_user_id=None):
     """AI analyzes all task files and provides insights"""
-    user_id = get_jwt_identity()
+    user_id = current_user_id
     
     task = TaskInstance.query.get_or_404(task_id)
     
@@ -159,51 +244,39 @@ def task_ai_analyze(task_id, current_user_id=None):
         raise APIError('AI access denied', 403)
     
     # Build comprehensive context
-    file_context = _build_file_context(task, detailed=True)
+    task_files = _load_prompt_files(task)
+    file_context = _build_file_context(task.id, task_files, detailed=True)
     
     if not file_context:
         raise APIError('No files to analyze', 400)
     
-    prompt = f"""Analyze the following task and its files:
-
-Task: {task.title}
-Description: {task.description}
-Status: {task.status}
-Priority: {task.priority}
-
-Files:
-{file_context}
-
-Provide:
-1. Summary of the task based on files
-2. Key insights and findings
-3. Potential issues or concerns
-4. Recommendations for next steps
-5. Suggested subtasks to complete this task
-"""
+    prompt = TASK_ANALYZE_PROMPT.format(
+        title=task.title,
+        description=task.description,
+        status=task.status,
+        priority=task.priority,
+        file_context=file_context
+    )
     
-    ai_response = _call_ai(prompt)
+    files_referenced = json.dumps([f.file_id for f in task_files])
     
-    # Log the analysis
-    ai_log = TaskAILog(
-        task_id=task.id,
-        user_id=user_id,
-        user_message="Analyze task and files",
-        ai_response=ai_response,
-        files_referenced=json.dumps([f.file_id for f in task.task_files.all()]),
-        action_taken='analyze'
-    )
-    db.session.add(ai_log)
+    # Return the connection to the pool while waiting on the AI service
+    db.session.close()
     
-    # Update AI suggestions
-    task.ai_suggestions = ai_response
-    task.updated_at = datetime.utcnow()
+    ai_response = _call_ai(prompt)
     
-    db.session.commit()
+    # Log the analysis and update AI suggestions in the background
+    record_interaction(current_app._get_current_object(), {
+        'task_id': task_id,
+        'user_id': user_id,
+        'user_message': "Analyze task and files",
+        'ai_response': ai_response,
+        'files_referenced': files_referenced,
+        'action_taken': 'analyze'
+    }, {'ai_suggestions': ai_response})
     
     return jsonify({
-        'analysis': ai_response,
-        'log_id': ai_log.id
+        'analysis': ai_response
     }), 200
 
 
@@ -243,9 +316,9 @@ def create_subtask(task_id, current_user_id=None):
 
 @task_instance_bp.route('/task-instances/<int:task_id>/subtasks', methods=['GET'])
 @token_required
-def get_subtasks(task_id):
+def get_subtasks(task_id, current_user_id=None):
     """Get all subtasks for a task"""
-    user_id = get_jwt_identity()
+    user_id = current_user_id
     
     task = TaskInstance.query.get_or_404(task_id)
     
@@ -253,7 +326,7 @@ def get_subtasks(task_id):
     if not _check_task_access(task, user_id):
         raise APIError('Access denied', 403)
     
-    subtasks = task.subtasks.all()
+    subtasks = _load_subtasks(task)
     
     return jsonify({
         'subtasks': [st.to_dict() for st in subtasks],
@@ -291,7 +364,6 @@ def update_subtask(task_id, subtask_id):
     if 'assignee_id' in data:
         subtask.assignee_id = data['assignee_id']
     
-    subtask.updated_at = datetime.utcnow()
     db.session.commit()
     
     return jsonify({
@@ -319,8 +391,9 @@ def attach_file_to_task(task_id):
         raise APIError('Permission denied to add files', 403)
     
     # Check if already attached
-    existing = TaskFile.query.filter_by(task_id=task.id, file_id=file.id).first()
-    if existing:
+    if db.session.query(
+        TaskFile.query.filter_by(task_id=task.id, file_id=file.id).exists()
+    ).scalar():
         raise APIError('File already attached to this task', 400)
     
     task_file = TaskFile(
@@ -333,6 +406,7 @@ def attach_file_to_task(task_id):
     
     db.session.add(task_file)
     db.session.commit()
+    _invalidate_file_context(task.id)
     
     return jsonify({
         'message': 'File attached to task successfully',
@@ -359,6 +433,7 @@ def remove_file_from_task(task_id, task_file_id):
     
     db.session.delete(task_file)
     db.session.commit()
+    _invalidate_file_context(task.id)
     
     return jsonify({'message': 'File removed from task successfully'}), 200
 
@@ -382,8 +457,9 @@ def add_collaborator(task_id):
             raise APIError('Permission denied', 403)
     
     # Check if already a collaborator
-    existing = TaskCollaborator.query.filter_by(task_id=task.id, user_id=data['user_id']).first()
-    if existing:
+    if db.session.query(
+        TaskCollaborator.query.filter_by(task_id=task.id, user_id=data['user_id']).exists()
+    ).scalar():
         raise APIError('User is already a collaborator', 400)
     
     role = data.get('role', 'viewer')
@@ -408,23 +484,34 @@ def add_collaborator(task_id):
 
 @task_instance_bp.route('/task-instances/<int:task_id>/export', methods=['GET'])
 @token_required
-def export_task_with_logs(task_id):
+def export_task_with_logs(task_id, current_user_id=None):
     """Export task instance with all AI logs and files"""
-    user_id = get_jwt_identity()
+    user_id = current_user_id
     
-    task = TaskInstance.query.get_or_404(task_id)
+    task = _get_task_with_users_or_404(task_id)
     
     # Check access
     if not _check_task_access(task, user_id):
         raise APIError('Access denied', 403)
     
+    ai_logs = TaskAILog.query.options(*loader_options(
+        joinedload(TaskAILog.user)
+    )).filter_by(task_id=task.id).order_by(TaskAILog.created_at).all()
+    
+    task_data = task.to_dict(
+        include_details=True,
+        subtasks=_load_subtasks(task),
+        task_files=_load_task_files(task),
+        collaborators=_load_collaborators(task)
+    )
+    
     # Build complete export
     export_data = {
-        'task': task.to_dict(include_details=True),
-        'ai_logs': [log.to_dict() for log in task.ai_logs.order_by(TaskAILog.created_at).all()],
-        'subtasks': [st.to_dict() for st in task.subtasks.all()],
-        'files': [tf.to_dict() for tf in task.task_files.all()],
-        'collaborators': [c.to_dict() for c in task.collaborators.all()],
+        'task': task_data,
+        'ai_logs': [log.to_dict() for log in ai_logs],
+        'subtasks': task_data['subtasks'],
+        'files': task_data['files'],
+        'collaborators': task_data['collaborators'],
         'exported_at': datetime.utcnow().isoformat(),
         'exported_by': user_id
     }
@@ -452,62 +539,196 @@ def _get_collaborator(task, user_id):
     return TaskCollaborator.query.filter_by(task_id=task.id, user_id=user_id).first()
 
 
-def _build_file_context(task, detailed=False):
-    """Build context from task files"""
-    task_files = task.task_files.all()
-    
+def _get_task_with_users_or_404(task_id):
+    """Load a task together with its owner, supervisor and assignee"""
+    return TaskInstance.query.options(*loader_options(
+        joinedload(TaskInstance.owner),
+        joinedload(TaskInstance.supervisor),
+        joinedload(TaskInstance.assignee)
+    )).filter_by(id=task_id).first_or_404()
+
+
+# The task collections are dynamic relationships, which cannot be eager
+# loaded; these load them in one query each together with the rows their
+# to_dict() output refers to, instead of lazy-loading those per row
+
+def _load_subtasks(task):
+    """Subtasks of a task with assignee and creator loaded"""
+    return SubTask.query.options(*loader_options(
+        joinedload(SubTask.assignee),
+        joinedload(SubTask.creator)
+    )).filter_by(parent_task_id=task.id).all()
+
+
+def _load_task_files(task):
+    """Task files of a task with the file and uploader loaded"""
+    return TaskFile.query.options(*loader_options(
+        joinedload(TaskFile.file),
+        joinedload(TaskFile.uploader)
+    )).filter_by(task_id=task.id).all()
+
+
+def _load_prompt_files(task):
+    """
+    Column rows for the files attached to a task, with just what the AI
+    handlers use (no ORM instances, no extracted_text)
+    """
+    return db.session.query(
+        TaskFile.id,
+        TaskFile.file_id,
+        TaskFile.notes,
+        File.filename,
+        File.mime_type,
+        File.file_size,
+        File.updated_at
+    ).join(File, File.id == TaskFile.file_id).filter(TaskFile.task_id == task.id).all()
+
+
+def _load_collaborators(task):
+    """Collaborators of a task with their users loaded"""
+    return TaskCollaborator.query.options(*loader_options(
+        joinedload(TaskCollaborator.user)
+    )).filter_by(task_id=task.id).all()
+
+
+def _build_file_context(task_id, task_files, detailed=False):
+    """
+    Build context from the task file rows returned by _load_prompt_files
+    
+    The context is cached per (task_id, detailed) together with a
+    fingerprint of the attached files, so it is only rebuilt (and the
+    extracted text only fetched) when a file is attached, removed or
+    updated.
+    """
     if not task_files:
         return ""
     
-    context = ""
+    key = (task_id, detailed)
+    fingerprint = tuple(
+        (tf.id, tf.file_id, tf.updated_at, tf.notes if detailed else None)
+        for tf in task_files
+    )
+    
+    with _file_context_lock:
+        cached = _file_context_cache.get(key)
+        if cached and cached[0] == fingerprint:
+            _file_context_cache.move_to_end(key)
+            return cached[1]
+    
+    # Fetch only the prefix of each file's text that goes into the prompt
+    text_length = FILE_CONTEXT_DETAILED_TEXT_LENGTH if detailed else FILE_CONTEXT_TEXT_LENGTH
+    texts = dict(db.session.query(
+        File.id, func.substr(File.extracted_text, 1, text_length)
+    ).filter(File.id.in_([tf.file_id for tf in task_files])).all())
+    
+    # Collect the pieces and join once instead of re-copying the growing
+    # string for every file
+    parts = []
     for tf in task_files:
-        file = tf.file
-        context += f"\n--- File: {file.filename} ---\n"
+        parts.append(f"\n--- File: {tf.filename} ---\n")
         
         if detailed and tf.notes:
-            context += f"Notes: {tf.notes}\n"
+            parts.append(f"Notes: {tf.notes}\n")
         
-        if file.extracted_text:
-            # Limit text length
-            text = file.extracted_text[:2000] if not detailed else file.extracted_text[:5000]
-            context += f"{text}\n"
+        text = texts.get(tf.file_id)
+        if text:
+            parts.append(f"{text}\n")
         else:
-            context += f"[File type: {file.mime_type}, Size: {file.file_size_formatted}]\n"
+            parts.append(f"[File type: {tf.mime_type}, Size: {File.format_size(tf.file_size)}]\n")
+    
+    context = ''.join(parts)
+    
+    with _file_context_lock:
+        _file_context_cache[key] = (fingerprint, context)
+        if len(_file_context_cache) > FILE_CONTEXT_CACHE_SIZE:
+            _file_context_cache.popitem(last=False)
     
     return context
 
 
-def _initialize_ai_context(task):
-    """Initialize AI context for a new task"""
-    prompt = f"""Analyze this new task and provide initial guidance:
+def _invalidate_file_context(task_id):
+    """Drop the cached file contexts of a task"""
+    with _file_context_lock:
+        _file_context_cache.pop((task_id, False), None)
+        _file_context_cache.pop((task_id, True), None)
 
-Title: {task.title}
-Description: {task.description}
-Priority: {task.priority}
 
-Provide:
-1. Understanding of the task objective
-2. Suggested approach
-3. Potential challenges
-4. Recommended subtasks
-"""
+def _initialize_ai_context(task):
+    """Initialize AI context for a new task"""
+    prompt = TASK_INIT_PROMPT.format(
+        title=task.title,
+        description=task.description,
+        priority=task.priority
+    )
+    
+    task_id = task.id
+    
+    # Return the connection to the pool while waiting on the AI service
+    db.session.close()
     
     try:
         ai_response = _call_ai(prompt)
-        task.ai_context = ai_response[:500]
-        task.ai_suggestions = ai_response
+        _update_task_ai_fields(task_id, ai_context=ai_response[:500], ai_suggestions=ai_response)
         db.session.commit()
     except Exception as e:
         print(f"Error initializing AI context: {e}")
 
 
+def _save_chat_log(task_id, user_id, message, ai_response, files_referenced):
+    """Log an AI chat exchange and store its summary as the task's AI context"""
+    ai_log = TaskAILog(
+        task_id=task_id,
+        user_id=user_id,
+        user_message=message,
+        ai_response=ai_response,
+        files_referenced=files_referenced,
+        action_taken='chat'
+    )
+    db.session.add(ai_log)
+    
+    # Update task AI context
+    _update_task_ai_fields(task_id, ai_context=ai_response[:500])  # Store summary
+    
+    db.session.commit()
+    return ai_log
+
+
+def _stream_task_ai_chat(task_id, user_id, message, prompt, files_referenced):
+    """Yield the AI reply as NDJSON lines and log the full exchange at the end"""
+    chunks = []
+    try:
+        for chunk in _stream_ai(prompt):
+            chunks.append(chunk)
+            yield json.dumps({'response': chunk}) + '\n'
+    except APIError as e:
+        yield json.dumps({'error': e.message}) + '\n'
+        return
+    
+    ai_log = _save_chat_log(task_id, user_id, message, ''.join(chunks), files_referenced)
+    yield json.dumps({'done': True, 'log_id': ai_log.id}) + '\n'
+
+
+def _update_task_ai_fields(task_id, **values):
+    """
+    Write AI results onto a task without loading it again
+    
+    Used after the session was closed for an AI call, so the follow-up
+    transaction is a single UPDATE instead of a SELECT plus UPDATE.
+    """
+    db.session.execute(
+        update(TaskInstance)
+        .where(TaskInstance.id == task_id)
+        .values(**values)
+    )
+
+
 def _call_ai(prompt):
     """Call AI API"""
     ai_api_url = os.getenv('AI_API_URL', 'http://localhost:11434/api/generate')
     ai_model = os.getenv('AI_MODEL', 'phi3')
     
     try:
-        response = requests.post(
+        response = _ai_session.post(
             ai_api_url,
             json={
                 'model': ai_model,
@@ -526,3 +747,37 @@ def _call_ai(prompt):
     except requests.exceptions.RequestException as e:
         raise APIError(f'AI service unavailable: {str(e)}', 503)
 
+
+def _stream_ai(prompt):
+    """Call AI API in streaming mode, yielding response text as it is generated"""
+    ai_api_url = os.getenv('AI_API_URL', 'http://localhost:11434/api/generate')
+    ai_model = os.getenv('AI_MODEL', 'phi3')
+    
+    try:
+        with _ai_session.post(
+            ai_api_url,
+            json={
+                'model': ai_model,
+                'prompt': prompt,
+                'stream': True
+            },
+            stream=True,
+            timeout=30
+        ) as response:
+            if response.status_code != 200:
+                raise APIError(f'AI API error: {response.status_code}', 500)
+            
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                # Skip malformed or partial NDJSON lines rather than
+                # aborting the response mid-stream
+                try:
+                    chunk = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(chunk, dict):
+                    yield chunk.get('response', '')
+    
+    except requests.exceptions.RequestException as e:
+        raise APIError(f'AI service unavailable: {str(e)}', 503)
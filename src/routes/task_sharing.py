@@ -1,8 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 import secrets
-import string
+from string import Template
 from datetime import datetime, timedelta
-from flask_jwt_extended import get_jwt_identity
+from flask_jwt_extended import get_jwt
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from ..models.models import db, Task, User, TaskShare
 from ..middleware.auth import token_required
 from ..utils.validation import (
@@ -11,46 +14,43 @@ from ..utils.validation import (
     SharedTaskUpdateSchema,
 )
 from ..utils.errors import APIError, ValidationError
-import smtplib
+from ..services.email_queue import queue_email
+from ..services.smtp_pool import get_smtp_pool
+from ..services.share_access_queue import record_access
+from ..services.response_cache import invalidate, TEAM_STATS_KEY
+from email.generator import BytesGenerator
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from functools import lru_cache
+import io
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 task_sharing_bp = Blueprint('task_sharing', __name__)
 
-def generate_share_token(length=32):
-    """Generate a secure random token for task sharing"""
-    alphabet = string.ascii_letters + string.digits
-    return ''.join(secrets.choice(alphabet) for _ in range(length))
+# Recipients per invitation message (RFC 5321 servers must accept 100)
+MAX_RECIPIENTS_PER_EMAIL = 50
 
-def send_task_invitation_email(recipient_email, task_title, share_link, sender_name):
-    """Send task invitation email"""
-    try:
-        # Email configuration from environment variables
-        smtp_server = os.getenv('SMTP_SERVER', 'localhost')
-        smtp_port = int(os.getenv('SMTP_PORT', 587))
-        smtp_username = os.getenv('SMTP_USERNAME', '')
-        smtp_password = os.getenv('SMTP_PASSWORD', '')
-        from_email = os.getenv('FROM_EMAIL', 'noreply@alex.local')
-        
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = f'Task Assignment: {task_title}'
-        msg['From'] = from_email
-        msg['To'] = recipient_email
-        
-        # HTML email body
-        html = f"""
+# Encoded invitation messages kept for reuse across batches and retries
+INVITATION_CACHE_SIZE = 64
+
+# Share permissions that allow updating the shared task
+WRITE_PERMISSIONS = frozenset({'edit', 'admin'})
+
+# Invitation email bodies, filled in with task_title, share_link and sender_name
+INVITATION_HTML_TEMPLATE = Template("""
         <html>
           <head>
             <style>
-              body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-              .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-              .header {{ background-color: #000; color: #fff; padding: 20px; text-align: center; }}
-              .content {{ background-color: #f9f9f9; padding: 30px; }}
-              .button {{ display: inline-block; padding: 12px 30px; background-color: #000; 
-                        color: #fff; text-decoration: none; border-radius: 5px; margin: 20px 0; }}
-              .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; }}
+              body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+              .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+              .header { background-color: #000; color: #fff; padding: 20px; text-align: center; }
+              .content { background-color: #f9f9f9; padding: 30px; }
+              .button { display: inline-block; padding: 12px 30px; background-color: #000; 
+                        color: #fff; text-decoration: none; border-radius: 5px; margin: 20px 0; }
+              .footer { text-align: center; padding: 20px; color: #666; font-size: 12px; }
             </style>
           </head>
           <body>
@@ -60,13 +60,13 @@ def send_task_invitation_email(recipient_email, task_title, share_link, sender_n
               </div>
               <div class="content">
                 <h2>You've been assigned a task!</h2>
-                <p><strong>{sender_name}</strong> has assigned you the following task:</p>
-                <h3>{task_title}</h3>
+                <p><strong>$sender_name</strong> has assigned you the following task:</p>
+                <h3>$task_title</h3>
                 <p>Click the button below to access your AI-enabled task board:</p>
-                <a href="{share_link}" class="button">Open Task Board</a>
+                <a href="$share_link" class="button">Open Task Board</a>
                 <p style="margin-top: 30px; font-size: 14px; color: #666;">
                   Or copy and paste this link into your browser:<br>
-                  <code>{share_link}</code>
+                  <code>$share_link</code>
                 </p>
                 <hr style="margin: 30px 0; border: none; border-top: 1px solid #ddd;">
                 <h4>What you can do:</h4>
@@ -84,18 +84,17 @@ def send_task_invitation_email(recipient_email, task_title, share_link, sender_n
             </div>
           </body>
         </html>
-        """
-        
-        # Plain text version
-        text = f"""
+        """)
+
+INVITATION_TEXT_TEMPLATE = Template("""
         Alex AI Workspace - Task Assignment
         
         You've been assigned a task!
         
-        {sender_name} has assigned you: {task_title}
+        $sender_name has assigned you: $task_title
         
         Access your AI-enabled task board here:
-        {share_link}
+        $share_link
         
         What you can do:
         - View task details and progress
@@ -105,28 +104,102 @@ def send_task_invitation_email(recipient_email, task_title, share_link, sender_n
         
         ---
         This is an automated message from Alex AI Workspace
-        """
-        
-        part1 = MIMEText(text, 'plain')
-        part2 = MIMEText(html, 'html')
-        msg.attach(part1)
-        msg.attach(part2)
-        
-        # Send email
-        if smtp_username and smtp_password:
-            with smtplib.SMTP(smtp_server, smtp_port) as server:
-                server.starttls()
-                server.login(smtp_username, smtp_password)
-                server.send_message(msg)
-        else:
-            # For development: just log the email
-            print(f"[DEV MODE] Email would be sent to {recipient_email}")
-            print(f"Share link: {share_link}")
-        
-        return True
+        """)
+
+def generate_share_token(nbytes=24):
+    """
+    Generate a secure random token for task sharing
+    
+    24 random bytes (32 URL-safe characters) make collisions practically
+    impossible; the unique index on share_token catches any that happen.
+    """
+    return secrets.token_urlsafe(nbytes)
+
+def _get_sender_name(user_id):
+    """Name of the current user, from the access token claims when present"""
+    name = get_jwt().get('name')
+    if name:
+        return name
+    # Tokens issued before the name claim was added
+    user = User.query.get(user_id)
+    return user.name if user else ''
+
+@lru_cache(maxsize=None)
+def _frontend_url():
+    """Base URL share links point at, read once"""
+    return os.getenv('FRONTEND_URL', 'http://localhost:5173')
+
+@lru_cache(maxsize=None)
+def _smtp_config():
+    """SMTP server, port, username, password and sender address, read once"""
+    return (
+        os.getenv('SMTP_SERVER', 'localhost'),
+        int(os.getenv('SMTP_PORT', 587)),
+        os.getenv('SMTP_USERNAME', ''),
+        os.getenv('SMTP_PASSWORD', ''),
+        os.getenv('FROM_EMAIL', 'noreply@alex.local')
+    )
+
+def reload_config():
+    """Re-read FRONTEND_URL and the SMTP settings (e.g. after tests change them)"""
+    _frontend_url.cache_clear()
+    _smtp_config.cache_clear()
+
+@lru_cache(maxsize=INVITATION_CACHE_SIZE)
+def _render_task_invitation(task_title, share_link, sender_name, from_email):
+    """
+    Build and encode an invitation message, ready for SMTP DATA
+    
+    Cached, so further recipient batches of the same share and retries
+    reuse the encoded bytes instead of rebuilding the MIME message.
+    """
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = f'Task Assignment: {task_title}'
+    msg['From'] = from_email
+    msg['To'] = 'undisclosed-recipients:;'
+    
+    values = {
+        'task_title': task_title,
+        'share_link': share_link,
+        'sender_name': sender_name
+    }
+    part1 = MIMEText(INVITATION_TEXT_TEMPLATE.substitute(values), 'plain')
+    part2 = MIMEText(INVITATION_HTML_TEMPLATE.substitute(values), 'html')
+    msg.attach(part1)
+    msg.attach(part2)
+    
+    # Same flattening smtplib's send_message does
+    with io.BytesIO() as buffer:
+        BytesGenerator(buffer).flatten(msg, linesep='\r\n')
+        return buffer.getvalue()
+
+def send_task_invitation_email(recipient_emails, task_title, share_link, sender_name):
+    """
+    Send one task invitation email to a list of recipients
+    
+    The body is the same for everyone, so the message goes out once with
+    one RCPT TO per recipient and the list hidden from the headers.
+    Delivery errors are re-raised so the email queue can retry them.
+    """
+    smtp_server, smtp_port, smtp_username, smtp_password, from_email = _smtp_config()
+    
+    if not (smtp_username and smtp_password):
+        # For development: just log the email, without building it
+        print(f"[DEV MODE] Email would be sent to {', '.join(recipient_emails)}")
+        print(f"Share link: {share_link}")
+        return
+    
+    try:
+        # Send email over a pooled, already authenticated SMTP session
+        message = _render_task_invitation(task_title, share_link, sender_name, from_email)
+        pool = get_smtp_pool(smtp_server, smtp_port, smtp_username, smtp_password)
+        with pool.connection() as smtp:
+            refused = smtp.sendmail(from_email, recipient_emails, message)
+        if refused:
+            logger.warning(f"Email recipients refused: {', '.join(refused)}")
     except Exception as e:
         print(f"Error sending email: {str(e)}")
-        return False
+        raise
 
 @task_sharing_bp.route('/share', methods=['POST'])
 @token_required
@@ -134,66 +207,65 @@ def send_task_invitation_email(recipient_email, task_title, share_link, sender_n
 def share_task(current_user_id=None):
     """Create a shareable link for a task and optionally send email invitations"""
     try:
-        user_id = get_jwt_identity()
-        if not user_id:
-            raise APIError('Authentication required', 401)
-
-        current_user = User.query.get(user_id)
-        if not current_user:
-            raise APIError('User not found', 401)
-
         data = getattr(request, 'validated_data', None) or request.get_json() or {}
         task_id = data.get('task_id')
         emails = data.get('emails', [])  # List of email addresses
         permission = data.get('permission', 'view')  # view, edit, or admin
         expires_in_days = data.get('expires_in_days', 30)
         
+        # Drop duplicate addresses (case-insensitive), keeping the first
+        # spelling of each in first-seen order
+        unique_emails = {}
+        for email in emails:
+            unique_emails.setdefault(email.lower(), email)
+        emails = list(unique_emails.values())
+        
         # Get the task
         task = Task.query.get(task_id)
         if not task:
             raise APIError('Task not found', 404)
         
         # Check if user has permission to share
-        if current_user.id not in {task.assignee_id, task.supervisor_id}:
+        if current_user_id not in {task.assignee_id, task.supervisor_id}:
             raise APIError('You do not have permission to share this task', 403)
         
-        # Generate unique share token
-        share_token = generate_share_token()
-        
         # Calculate expiration date
         expires_at = datetime.utcnow() + timedelta(days=expires_in_days)
         
-        # Create task share record
-        task_share = TaskShare(
-            task_id=task_id,
-            shared_by=current_user.id,
-            share_token=share_token,
-            permission=permission,
-            expires_at=expires_at
-        )
-        
-        db.session.add(task_share)
-        db.session.commit()
+        # Create task share record, retrying once with a fresh token in the
+        # (practically impossible) case of a token collision
+        for attempt in range(2):
+            share_token = generate_share_token()
+            task_share = TaskShare(
+                task_id=task_id,
+                shared_by=current_user_id,
+                share_token=share_token,
+                permission=permission,
+                expires_at=expires_at
+            )
+            db.session.add(task_share)
+            try:
+                db.session.commit()
+                break
+            except IntegrityError:
+                db.session.rollback()
+                if attempt:
+                    raise
         
         # Generate share link
-        base_url = os.getenv('FRONTEND_URL', 'http://localhost:5173')
+        base_url = _frontend_url()
         share_link = f"{base_url}/task/{share_token}"
         
-        # Send email invitations
-        sent_emails = []
-        failed_emails = []
-        
-        for email in emails:
-            success = send_task_invitation_email(
-                recipient_email=email,
+        # Queue email invitations; they are sent in the background, one
+        # message per batch of recipients
+        for i in range(0, len(emails), MAX_RECIPIENTS_PER_EMAIL):
+            queue_email(
+                send_task_invitation_email,
+                recipient_emails=emails[i:i + MAX_RECIPIENTS_PER_EMAIL],
                 task_title=task.title,
                 share_link=share_link,
-                sender_name=current_user.name
+                sender_name=_get_sender_name(current_user_id)
             )
-            if success:
-                sent_emails.append(email)
-            else:
-                failed_emails.append(email)
         
         return jsonify({
             'message': 'Task shared successfully',
@@ -201,8 +273,7 @@ def share_task(current_user_id=None):
             'share_link': share_link,
             'permission': permission,
             'expires_at': expires_at.isoformat(),
-            'emails_sent': sent_emails,
-            'emails_failed': failed_emails
+            'emails_queued': emails
         }), 201
         
     except APIError as e:
@@ -214,8 +285,11 @@ def share_task(current_user_id=None):
 def access_shared_task(share_token):
     """Access a shared task using the share token (no authentication required)"""
     try:
-        # Find the task share
-        task_share = TaskShare.query.filter_by(share_token=share_token).first()
+        # Find the task share, with its task and sharer in the same query
+        task_share = TaskShare.query.options(
+            joinedload(TaskShare.task),
+            joinedload(TaskShare.sharer)
+        ).filter_by(share_token=share_token).first()
         
         if not task_share:
             raise APIError('Invalid or expired share link', 404)
@@ -228,18 +302,16 @@ def access_shared_task(share_token):
         if task_share.revoked:
             raise APIError('This share link has been revoked', 403)
         
-        # Get the task
-        task = Task.query.get(task_share.task_id)
+        task = task_share.task
         if not task:
             raise APIError('Task not found', 404)
         
-        # Update access count and last accessed
-        task_share.access_count += 1
-        task_share.last_accessed = datetime.utcnow()
-        db.session.commit()
+        # Count the visit in the background; the batched UPDATE adds it to
+        # access_count and sets last_accessed
+        record_access(current_app._get_current_object(), task_share.id, datetime.utcnow())
+        access_count = (task_share.access_count or 0) + 1
         
-        # Get shared by user info
-        shared_by_user = User.query.get(task_share.shared_by)
+        shared_by_user = task_share.sharer
         
         return jsonify({
             'task': {
@@ -257,7 +329,7 @@ def access_shared_task(share_token):
                 'shared_by': shared_by_user.name if shared_by_user else 'Unknown',
                 'shared_at': task_share.created_at.isoformat() if task_share.created_at else None,
                 'expires_at': task_share.expires_at.isoformat() if task_share.expires_at else None,
-                'access_count': task_share.access_count
+                'access_count': access_count
             }
         }), 200
         
@@ -286,7 +358,7 @@ def update_shared_task(share_token):
             raise APIError('This share link has expired', 410)
         
         # Check permission
-        if task_share.permission not in ['edit', 'admin']:
+        if task_share.permission not in WRITE_PERMISSIONS:
             raise APIError('You do not have permission to edit this task', 403)
         
         # Get the task
@@ -312,6 +384,7 @@ def update_shared_task(share_token):
 
         task.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate(TEAM_STATS_KEY)
         
         return jsonify({
             'message': 'Task updated successfully',
@@ -334,21 +407,13 @@ def update_shared_task(share_token):
 def revoke_share(share_token, current_user_id=None):
     """Revoke a share link"""
     try:
-        user_id = get_jwt_identity()
-        if not user_id:
-            raise APIError('Authentication required', 401)
-
-        current_user = User.query.get(user_id)
-        if not current_user:
-            raise APIError('User not found', 401)
-
         task_share = TaskShare.query.filter_by(share_token=share_token).first()
 
         if not task_share:
             raise APIError('Share link not found', 404)
 
         # Check if user has permission to revoke
-        if task_share.shared_by != current_user.id:
+        if task_share.shared_by != current_user_id:
             raise APIError('You do not have permission to revoke this share link', 403)
 
         task_share.revoked = True
@@ -368,24 +433,27 @@ def revoke_share(share_token, current_user_id=None):
 def list_task_shares(task_id, current_user_id=None):
     """List all share links for a task"""
     try:
-        user_id = get_jwt_identity()
-        if not user_id:
-            raise APIError('Authentication required', 401)
-
-        current_user = User.query.get(user_id)
-        if not current_user:
-            raise APIError('User not found', 401)
-
         task = Task.query.get(task_id)
         if not task:
             raise APIError('Task not found', 404)
 
-        if current_user.id not in {task.assignee_id, task.supervisor_id}:
+        if current_user_id not in {task.assignee_id, task.supervisor_id}:
             raise APIError('You do not have permission to view shares for this task', 403)
         
-        shares = TaskShare.query.filter_by(task_id=task_id).all()
-        
-        base_url = os.getenv('FRONTEND_URL', 'http://localhost:5173')
+        # Only the columns the response needs, as plain rows
+        shares = db.session.execute(
+            select(
+                TaskShare.share_token,
+                TaskShare.permission,
+                TaskShare.created_at,
+                TaskShare.expires_at,
+                TaskShare.access_count,
+                TaskShare.last_accessed,
+                TaskShare.revoked
+            ).where(TaskShare.task_id == task_id)
+        ).all()
+        
+        base_url = _frontend_url()
         
         return jsonify({
             'shares': [{
@@ -3,16 +3,66 @@ Task management routes with validation and pagination
 """
 from flask import Blueprint, request, jsonify
 from datetime import datetime
+from sqlalchemy import and_, false, or_, update
+from sqlalchemy.orm import joinedload
 from src.models.models import db, Task
 from src.middleware.auth import token_required, get_current_user
 from src.utils.validation import validate_request, TaskSchema
 from src.utils.errors import NotFoundError, ValidationError
+from src.utils.loading import loader_options
+from src.services.response_cache import invalidate, TEAM_STATS_KEY
+import base64
+import binascii
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
 tasks_bp = Blueprint('tasks', __name__)
 
+VALID_STATUSES = frozenset({'todo', 'in-progress', 'done'})
+TRUTHY_VALUES = frozenset({'true', '1', 'yes'})
+
+
+def _encode_task_cursor(task):
+    """Encode a task's sort key (urgent, deadline, id) as an opaque cursor"""
+    key = [
+        bool(task.urgent),
+        task.deadline.isoformat() if task.deadline else None,
+        task.id
+    ]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def _decode_task_cursor(cursor):
+    """Decode a cursor from _encode_task_cursor into (urgent, deadline, id)"""
+    try:
+        urgent, deadline, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if deadline is not None:
+            deadline = datetime.fromisoformat(deadline)
+        return bool(urgent), deadline, int(task_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise ValidationError('Invalid pagination cursor')
+
+
+def _after_task_cursor(urgent, deadline, task_id):
+    """
+    Filter for tasks sorted after the given key in
+    (urgent DESC, deadline ASC NULLS LAST, id ASC) order
+    """
+    if deadline is None:
+        same_urgent_after = and_(Task.deadline.is_(None), Task.id > task_id)
+    else:
+        same_urgent_after = or_(
+            Task.deadline > deadline,
+            Task.deadline.is_(None),
+            and_(Task.deadline == deadline, Task.id > task_id)
+        )
+    return or_(
+        Task.urgent == False if urgent else false(),  # noqa: E712
+        and_(Task.urgent == urgent, same_urgent_after)
+    )
+
 
 @tasks_bp.route('/tasks', methods=['GET'])
 @token_required
@@ -20,11 +70,13 @@ def get_tasks(current_user_id=None):
     """
     Get all tasks with pagination and filtering
     ---
-    GET /api/tasks?page=1&per_page=20&status=todo&urgent=true
+    GET /api/tasks?per_page=20&status=todo&urgent=true&after=<next_cursor>
     Headers: Authorization: Bearer <token>
+    
+    Pages are keyset based: pass the previous page's next_cursor as after.
     """
     # Pagination parameters
-    page = request.args.get('page', 1, type=int)
+    after = request.args.get('after')
     per_page = min(request.args.get('per_page', 20, type=int), 100)  # Max 100 per page
     
     # Filtering parameters
@@ -32,35 +84,44 @@ def get_tasks(current_user_id=None):
     urgent = request.args.get('urgent')
     assignee_id = request.args.get('assignee_id', type=int)
     
-    # Build query
-    query = Task.query
+    # Build query, loading assignee and supervisor with the tasks for to_dict;
+    # in strict mode any other relationship access raises instead of lazy loading
+    query = Task.query.options(*loader_options(
+        joinedload(Task.assignee),
+        joinedload(Task.supervisor)
+    ))
     
     if status:
-        if status not in ['todo', 'in-progress', 'done']:
+        if status not in VALID_STATUSES:
             raise ValidationError('Invalid status value')
         query = query.filter_by(status=status)
     
     if urgent is not None:
-        urgent_bool = urgent.lower() in ['true', '1', 'yes']
+        urgent_bool = urgent.lower() in TRUTHY_VALUES
         query = query.filter_by(urgent=urgent_bool)
     
     if assignee_id:
         query = query.filter_by(assignee_id=assignee_id)
     
-    # Order by urgent first, then by deadline
-    query = query.order_by(Task.urgent.desc(), Task.deadline.asc())
+    if after:
+        query = query.filter(_after_task_cursor(*_decode_task_cursor(after)))
     
-    # Paginate
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    # Order by urgent first, then by deadline (id keeps the order stable)
+    query = query.order_by(
+        Task.urgent.desc(), Task.deadline.asc().nulls_last(), Task.id.asc()
+    )
+    
+    # Fetch one extra row to know whether there is a next page
+    tasks = query.limit(per_page + 1).all()
+    has_next = len(tasks) > per_page
+    tasks = tasks[:per_page]
     
     return jsonify({
-        'tasks': [task.to_dict(include_relations=True) for task in pagination.items],
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'current_page': page,
+        'tasks': [task.to_dict(include_relations=True) for task in tasks],
         'per_page': per_page,
-        'has_next': pagination.has_next,
-        'has_prev': pagination.has_prev
+        'has_next': has_next,
+        'has_prev': bool(after),
+        'next_cursor': _encode_task_cursor(tasks[-1]) if has_next else None
     }), 200
 
 
@@ -117,6 +178,7 @@ def create_task(current_user_id=None):
         
         db.session.add(new_task)
         db.session.commit()
+        invalidate(TEAM_STATS_KEY)
         
         logger.info(f'Task created: {new_task.id} - {new_task.title}')
         
@@ -162,7 +224,7 @@ def update_task(task_id, current_user_id=None):
             task.description = data['description']
         
         if 'status' in data:
-            if data['status'] not in ['todo', 'in-progress', 'done']:
+            if data['status'] not in VALID_STATUSES:
                 raise ValidationError('Invalid status value')
             task.status = data['status']
         
@@ -186,6 +248,7 @@ def update_task(task_id, current_user_id=None):
         
         task.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate(TEAM_STATS_KEY)
         
         logger.info(f'Task updated: {task.id} - {task.title}')
         
@@ -217,6 +280,7 @@ def delete_task(task_id, current_user_id=None):
     try:
         db.session.delete(task)
         db.session.commit()
+        invalidate(TEAM_STATS_KEY)
         
         logger.info(f'Task deleted: {task_id}')
         
@@ -230,7 +294,7 @@ def delete_task(task_id, current_user_id=None):
 
 @tasks_bp.route('/tasks/<int:task_id>/status', methods=['PATCH'])
 @token_required
-def update_task_status(task_id):
+def update_task_status(task_id, current_user_id=None):
     """
     Quick update task status
     ---
@@ -240,31 +304,39 @@ def update_task_status(task_id):
         "status": "done"
     }
     """
-    task = Task.query.get(task_id)
-    
-    if not task:
-        raise NotFoundError(f'Task with ID {task_id} not found')
-    
     data = request.json or {}
     new_status = data.get('status')
     
-    if not new_status or new_status not in ['todo', 'in-progress', 'done']:
+    if not new_status or new_status not in VALID_STATUSES:
         raise ValidationError('Valid status is required (todo, in-progress, done)')
     
     try:
-        task.status = new_status
-        task.updated_at = datetime.utcnow()
-        db.session.commit()
-        
-        logger.info(f'Task status updated: {task_id} -> {new_status}')
+        # Single UPDATE ... RETURNING instead of loading the task first
+        task = db.session.execute(
+            update(Task)
+            .where(Task.id == task_id)
+            .values(status=new_status, updated_at=datetime.utcnow())
+            .returning(Task)
+        ).scalar_one_or_none()
         
-        return jsonify({
-            'message': 'Task status updated successfully',
-            'task': task.to_dict()
-        }), 200
+        if task:
+            # Serialize before committing so the task isn't reloaded
+            task_data = task.to_dict()
+            db.session.commit()
+            invalidate(TEAM_STATS_KEY)
         
     except Exception as e:
         db.session.rollback()
         logger.error(f'Error updating task status: {str(e)}')
         raise
+    
+    if not task:
+        raise NotFoundError(f'Task with ID {task_id} not found')
+    
+    logger.info(f'Task status updated: {task_id} -> {new_status}')
+    
+    return jsonify({
+        'message': 'Task status updated successfully',
+        'task': task_data
+    }), 200
 
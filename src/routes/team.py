@@ -3,18 +3,39 @@ Team Routes - Team Collaboration API
 Handles team member management and collaboration features
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, case, func, select, true
 from datetime import datetime
 
 from src.models.models import db, User, Task
 from src.middleware.auth import token_required
+from src.utils.loading import loader_options
+from src.services.response_cache import (
+    cached, TEAM_STATS_KEY, TEAM_ROLES_KEY, TEAM_ONLINE_KEY
+)
 
 team_bp = Blueprint('team', __name__)
 
+TRUTHY_VALUES = frozenset({'true', '1', 'yes'})
+
+
+def _count_only():
+    """Whether the request only wants the number of results (?count_only=true)"""
+    return request.args.get('count_only', '').lower() in TRUTHY_VALUES
+
+
+def _paginate(query):
+    """Paginate a list query from ?page= and ?per_page= (default 50, max 200)"""
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 50, type=int), 200)
+    return query.paginate(page=page, per_page=per_page, error_out=False)
+
+
+def _count(query, column):
+    """Run a list query as SELECT COUNT(column), without loading any rows"""
+    return query.order_by(None).with_entities(func.count(column)).scalar()
+
 
 @team_bp.route('/team/members', methods=['GET'])
-@jwt_required()
 @token_required
 def get_team_members(current_user_id):
     """
@@ -24,6 +45,7 @@ def get_team_members(current_user_id):
     - role: Filter by role
     - online: Filter by online status (true/false)
     - search: Search by name or email
+    - page, per_page: Pagination (default 50 per page, max 200)
     """
     try:
         # Get query parameters
@@ -51,11 +73,16 @@ def get_team_members(current_user_id):
                 )
             )
         
+        if _count_only():
+            return jsonify({'total': _count(query, User.id)}), 200
+        
         # Order by name
         query = query.order_by(User.name.asc())
         
-        # Get all members
-        members = query.all()
+        # Get a page of members, loading only the columns the response needs
+        pagination = _paginate(query.with_entities(
+            User.id, User.name, User.email, User.role, User.online, User.created_at
+        ))
         
         # Format response
         members_data = [{
@@ -65,11 +92,14 @@ def get_team_members(current_user_id):
             'role': member.role,
             'online': member.online,
             'created_at': member.created_at.isoformat() if member.created_at else None
-        } for member in members]
+        } for member in pagination.items]
         
         return jsonify({
             'members': members_data,
-            'total': len(members_data)
+            'total': pagination.total,
+            'page': pagination.page,
+            'per_page': pagination.per_page,
+            'pages': pagination.pages
         }), 200
         
     except Exception as e:
@@ -77,7 +107,6 @@ def get_team_members(current_user_id):
 
 
 @team_bp.route('/team/members/<int:member_id>', methods=['GET'])
-@jwt_required()
 @token_required
 def get_team_member(current_user_id, member_id):
     """Get detailed information about a specific team member"""
@@ -87,13 +116,14 @@ def get_team_member(current_user_id, member_id):
         if not member:
             return jsonify({'error': 'Team member not found'}), 404
         
-        # Get member's task statistics
-        assigned_tasks = Task.query.filter_by(assignee_id=member_id).count()
-        supervised_tasks = Task.query.filter_by(supervisor_id=member_id).count()
-        completed_tasks = Task.query.filter_by(
-            assignee_id=member_id,
-            status='completed'
-        ).count()
+        # Get member's task statistics in a single pass over their tasks
+        assigned_tasks, supervised_tasks, completed_tasks = db.session.query(
+            func.count(case((Task.assignee_id == member_id, 1))),
+            func.count(case((Task.supervisor_id == member_id, 1))),
+            func.count(case((and_(Task.assignee_id == member_id, Task.status == 'completed'), 1)))
+        ).filter(
+            or_(Task.assignee_id == member_id, Task.supervisor_id == member_id)
+        ).one()
         
         return jsonify({
             'id': member.id,
@@ -114,7 +144,6 @@ def get_team_member(current_user_id, member_id):
 
 
 @team_bp.route('/team/members/<int:member_id>/tasks', methods=['GET'])
-@jwt_required()
 @token_required
 def get_member_tasks(current_user_id, member_id):
     """Get tasks assigned to or supervised by a team member"""
@@ -138,8 +167,16 @@ def get_member_tasks(current_user_id, member_id):
         if status:
             query = query.filter_by(status=status)
         
-        # Order by deadline
-        query = query.order_by(Task.deadline.asc())
+        if _count_only():
+            return jsonify({
+                'member_id': member_id,
+                'task_type': task_type,
+                'total': _count(query, Task.id)
+            }), 200
+        
+        # Order by deadline; relationships are never serialized here, so in
+        # strict mode any accidental lazy load fails loudly instead of adding N queries
+        query = query.options(*loader_options()).order_by(Task.deadline.asc())
         
         tasks = query.all()
         
@@ -168,13 +205,29 @@ def get_member_tasks(current_user_id, member_id):
 
 
 @team_bp.route('/team/stats', methods=['GET'])
-@jwt_required()
 @token_required
+@cached(TEAM_STATS_KEY, ttl=30)
 def get_team_stats(current_user_id):
     """Get overall team statistics"""
     try:
-        total_members = User.query.count()
-        online_members = User.query.filter_by(online=True).count()
+        # Member and task counts in one round trip: each aggregate is a
+        # one-row subquery, cross joined in a single SELECT
+        member_counts = select(
+            func.count(User.id).label('total_members'),
+            func.count(case((User.online.is_(True), 1))).label('online_members')
+        ).subquery()
+        task_counts = select(
+            func.count(Task.id).label('total_tasks'),
+            func.count(case((Task.status.in_(['todo', 'in-progress']), 1))).label('active_tasks'),
+            func.count(case((Task.status == 'completed', 1))).label('completed_tasks')
+        ).subquery()
+        counts = db.session.execute(
+            select(member_counts, task_counts).select_from(
+                member_counts.join(task_counts, true())
+            )
+        ).one()
+        total_members = counts.total_members
+        online_members = counts.online_members
         
         # Count by role
         roles = db.session.query(
@@ -184,13 +237,6 @@ def get_team_stats(current_user_id):
         
         role_counts = {role: count for role, count in roles}
         
-        # Task statistics
-        total_tasks = Task.query.count()
-        active_tasks = Task.query.filter(
-            Task.status.in_(['todo', 'in-progress'])
-        ).count()
-        completed_tasks = Task.query.filter_by(status='completed').count()
-        
         return jsonify({
             'team': {
                 'total_members': total_members,
@@ -199,9 +245,9 @@ def get_team_stats(current_user_id):
                 'roles': role_counts
             },
             'tasks': {
-                'total': total_tasks,
-                'active': active_tasks,
-                'completed': completed_tasks
+                'total': counts.total_tasks,
+                'active': counts.active_tasks,
+                'completed': counts.completed_tasks
             }
         }), 200
         
@@ -210,23 +256,33 @@ def get_team_stats(current_user_id):
 
 
 @team_bp.route('/team/online', methods=['GET'])
-@jwt_required()
 @token_required
+@cached(TEAM_ONLINE_KEY, ttl=10)
 def get_online_members(current_user_id):
     """Get list of currently online team members"""
     try:
-        online_members = User.query.filter_by(online=True).order_by(User.name.asc()).all()
+        query = User.query.filter_by(online=True)
+        
+        if _count_only():
+            return jsonify({'count': _count(query, User.id)}), 200
+        
+        pagination = _paginate(query.with_entities(
+            User.id, User.name, User.email, User.role
+        ).order_by(User.name.asc()))
         
         members_data = [{
             'id': member.id,
             'name': member.name,
             'email': member.email,
             'role': member.role,
-        } for member in online_members]
+        } for member in pagination.items]
         
         return jsonify({
             'online_members': members_data,
-            'count': len(members_data)
+            'count': pagination.total,
+            'page': pagination.page,
+            'per_page': pagination.per_page,
+            'pages': pagination.pages
         }), 200
         
     except Exception as e:
@@ -234,8 +290,10 @@ def get_online_members(current_user_id):
 
 
 @team_bp.route('/team/roles', methods=['GET'])
-@jwt_required()
 @token_required
+# Roles only change through user writes, which invalidate this key, so the
+# DISTINCT scan runs at most every few minutes per worker
+@cached(TEAM_ROLES_KEY, ttl=300)
 def get_roles(current_user_id):
     """Get list of all roles in the team"""
     try:
@@ -252,7 +310,6 @@ def get_roles(current_user_id):
 
 
 @team_bp.route('/team/search', methods=['GET'])
-@jwt_required()
 @token_required
 def search_team_members(current_user_id):
     """
@@ -260,6 +317,7 @@ def search_team_members(current_user_id):
     
     Query Parameters:
     - q: Search query
+    - page, per_page: Pagination (default 50 per page, max 200)
     """
     try:
         search_query = request.args.get('q', '').strip()
@@ -269,13 +327,20 @@ def search_team_members(current_user_id):
         
         search_term = f"%{search_query}%"
         
-        members = User.query.filter(
+        query = User.query.filter(
             or_(
                 User.name.ilike(search_term),
                 User.email.ilike(search_term),
                 User.role.ilike(search_term)
             )
-        ).order_by(User.name.asc()).all()
+        )
+        
+        if _count_only():
+            return jsonify({'query': search_query, 'count': _count(query, User.id)}), 200
+        
+        pagination = _paginate(query.with_entities(
+            User.id, User.name, User.email, User.role, User.online
+        ).order_by(User.name.asc()))
         
         members_data = [{
             'id': member.id,
@@ -283,12 +348,15 @@ def search_team_members(current_user_id):
             'email': member.email,
             'role': member.role,
             'online': member.online,
-        } for member in members]
+        } for member in pagination.items]
         
         return jsonify({
             'query': search_query,
             'members': members_data,
-            'count': len(members_data)
+            'count': pagination.total,
+            'page': pagination.page,
+            'per_page': pagination.per_page,
+            'pages': pagination.pages
         }), 200
         
     except Exception as e:
@@ -296,7 +364,6 @@ def search_team_members(current_user_id):
 
 
 @team_bp.route('/team/collaborators', methods=['GET'])
-@jwt_required()
 @token_required
 def get_potential_collaborators(current_user_id):
     """
@@ -304,9 +371,14 @@ def get_potential_collaborators(current_user_id):
     Excludes the current user
     """
     try:
-        members = User.query.filter(
-            User.id != current_user_id
-        ).order_by(User.name.asc()).all()
+        query = User.query.filter(User.id != current_user_id)
+        
+        if _count_only():
+            return jsonify({'count': _count(query, User.id)}), 200
+        
+        pagination = _paginate(query.with_entities(
+            User.id, User.name, User.email, User.role, User.online
+        ).order_by(User.name.asc()))
         
         members_data = [{
             'id': member.id,
@@ -314,11 +386,14 @@ def get_potential_collaborators(current_user_id):
             'email': member.email,
             'role': member.role,
             'online': member.online
-        } for member in members]
+        } for member in pagination.items]
         
         return jsonify({
             'collaborators': members_data,
-            'count': len(members_data)
+            'count': pagination.total,
+            'page': pagination.page,
+            'per_page': pagination.per_page,
+            'pages': pagination.pages
         }), 200
         
     except Exception as e:
@@ -1,11 +1,12 @@
 """
 User management routes
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.models import db, User
 from src.utils.errors import AuthenticationError, ValidationError
-from src.middleware.auth import token_required
+from src.middleware.auth import token_required, create_user_access_token, set_access_cookie
+from src.services.response_cache import invalidate, TEAM_KEYS
 
 users_bp = Blueprint('users', __name__)
 
@@ -62,6 +63,7 @@ def update_current_user():
         raise AuthenticationError('User not found')
     
     data = request.get_json()
+    name_changed = 'name' in data and data['name'] != user.name
     
     # Update allowed fields
     if 'name' in data:
@@ -70,8 +72,15 @@ def update_current_user():
         user.role = data['role']
     
     db.session.commit()
+    invalidate(*TEAM_KEYS)
     
-    return jsonify(user.to_dict()), 200
+    response = make_response(jsonify(user.to_dict()), 200)
+    
+    # Reissue the access token so its name claim follows the rename
+    if name_changed:
+        set_access_cookie(response, create_user_access_token(user))
+    
+    return response
 
 
 @users_bp.route('/', methods=['GET'])
@@ -104,15 +113,26 @@ def list_users():
             (User.email.ilike(f'%{search}%'))
         )
     
-    # Paginate
-    pagination = query.order_by(User.created_at.desc()).paginate(
+    # Paginate, loading only the columns the response needs
+    pagination = query.with_entities(
+        User.id, User.name, User.email, User.role,
+        User.online, User.created_at, User.last_login
+    ).order_by(User.created_at.desc()).paginate(
         page=page,
         per_page=per_page,
         error_out=False
     )
     
     return jsonify({
-        'users': [user.to_dict() for user in pagination.items],
+        'users': [{
+            'id': user.id,
+            'name': user.name,
+            'email': user.email,
+            'role': user.role,
+            'online': user.online,
+            'created_at': user.created_at.isoformat() if user.created_at else None,
+            'last_login': user.last_login.isoformat() if user.last_login else None
+        } for user in pagination.items],
         'total': pagination.total,
         'page': page,
         'per_page': per_page,
@@ -0,0 +1,41 @@
+"""
+AI Log Queue
+Writes task AI interaction logs (and the matching task AI context updates)
+from a background worker, so the AI endpoints can respond as soon as the
+model has answered
+"""
+
+from sqlalchemy import insert, update
+
+from src.models.models import db
+from src.models.task_instance import TaskInstance, TaskAILog
+from src.services.batching_queue import BatchingQueue
+
+# How long the worker keeps collecting before writing a batch
+FLUSH_INTERVAL = 0.1
+
+
+def record_interaction(app, log, task_values):
+    """
+    Schedule an AI interaction to be logged
+
+    Args:
+        app: Flask application used to push a context for the write
+        log: TaskAILog column values (task_id, user_id, user_message, ...)
+        task_values: Columns to update on the task afterwards
+    """
+    _queue.put(app, (log, task_values))
+
+
+def _flush(items):
+    """Insert a batch of logs and apply the task updates"""
+    db.session.execute(insert(TaskAILog), [log for log, _ in items])
+    for log, task_values in items:
+        db.session.execute(
+            update(TaskInstance)
+            .where(TaskInstance.id == log['task_id'])
+            .values(**task_values)
+        )
+
+
+_queue = BatchingQueue('ai-log-queue', _flush, FLUSH_INTERVAL)
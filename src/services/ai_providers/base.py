@@ -5,6 +5,24 @@ Abstract base class for AI providers
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 
+import requests
+from requests.adapters import HTTPAdapter
+
+# Keep-alive connections held per provider host
+HTTP_POOL_SIZE = 50
+
+
+def create_http_session(pool_size: int = HTTP_POOL_SIZE) -> requests.Session:
+    """
+    Create a requests session with a connection pool, so repeated calls
+    to the same AI host reuse TCP/TLS connections
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
 
 class AIProvider(ABC):
     """Abstract base class for AI providers"""
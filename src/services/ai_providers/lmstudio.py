@@ -2,14 +2,39 @@
 LM Studio AI Provider
 Implementation for LM Studio local AI service with OpenAI-compatible API
 """
+import json
 import requests
 import logging
+import time
 from typing import Dict, Any, Optional, List
-from .base import AIProvider
+from .base import AIProvider, create_http_session
 from src.utils.errors import APIError
 
+try:
+    import orjson  # optional, much faster request encoding and response/SSE parsing
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj):
+        """Compact JSON bytes, like orjson.dumps"""
+        return json.dumps(obj, separators=(',', ':')).encode()
+    _json_loads = json.loads
+
+# Request bodies are serialized up front and sent as data=, so they need
+# the content type requests would otherwise set for json=
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
 logger = logging.getLogger(__name__)
 
+# Seconds the /models listing is reused, so status polling and get_info()
+# don't hit LM Studio on every call
+MODELS_CACHE_TTL = 5
+
+# stream_chat() batches tokens and yields once this many characters are
+# buffered or this many milliseconds passed since the last yield
+STREAM_CHUNK_CHARS = 64
+STREAM_FLUSH_MS = 50
+
 
 class LMStudioProvider(AIProvider):
     """
@@ -41,6 +66,8 @@ class LMStudioProvider(AIProvider):
         self.timeout = config.get('timeout', 60)
         self.temperature = config.get('temperature', 0.7)
         self.max_tokens = config.get('max_tokens', 2048)
+        self.session = create_http_session()
+        self._models_cache = (0.0, None)
     
     def chat(self, prompt: str, model: Optional[str] = None, **kwargs) -> Dict[str, Any]:
         """
@@ -87,9 +114,9 @@ class LMStudioProvider(AIProvider):
             messages = kwargs['history'] + messages
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f'{self.api_url}/chat/completions',
-                json={
+                data=_json_dumps({
                     'model': model_name,
                     'messages': messages,
                     'temperature': temperature,
@@ -99,12 +126,13 @@ class LMStudioProvider(AIProvider):
                     'presence_penalty': kwargs.get('presence_penalty', 0.0),
                     'stop': kwargs.get('stop', None),
                     'stream': False
-                },
+                }),
+                headers=JSON_HEADERS,
                 timeout=timeout
             )
             
             response.raise_for_status()
-            data = response.json()
+            data = _json_loads(response.content)
             
             # Extract response from OpenAI format
             choice = data['choices'][0]
@@ -150,10 +178,12 @@ class LMStudioProvider(AIProvider):
         Args:
             prompt: The prompt/message to send
             model: Optional model override
-            **kwargs: Additional parameters (same as chat())
+            **kwargs: Additional parameters (same as chat()), plus:
+                - chunk_chars: Characters to buffer per chunk (default STREAM_CHUNK_CHARS)
+                - flush_ms: Max milliseconds to hold buffered text (default STREAM_FLUSH_MS)
             
         Yields:
-            Chunks of the response as they arrive
+            Chunks of the response, a few tokens at a time
             
         Raises:
             APIError: If the request fails
@@ -162,6 +192,8 @@ class LMStudioProvider(AIProvider):
         temperature = kwargs.get('temperature', self.temperature)
         max_tokens = kwargs.get('max_tokens', self.max_tokens)
         timeout = kwargs.get('timeout', self.timeout)
+        chunk_chars = kwargs.get('chunk_chars', STREAM_CHUNK_CHARS)
+        flush_interval = kwargs.get('flush_ms', STREAM_FLUSH_MS) / 1000
         
         messages = [{"role": "user", "content": prompt}]
         
@@ -172,36 +204,54 @@ class LMStudioProvider(AIProvider):
             messages = kwargs['history'] + messages
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f'{self.api_url}/chat/completions',
-                json={
+                data=_json_dumps({
                     'model': model_name,
                     'messages': messages,
                     'temperature': temperature,
                     'max_tokens': max_tokens,
                     'stream': True
-                },
+                }),
+                headers=JSON_HEADERS,
                 timeout=timeout,
                 stream=True
             )
             
             response.raise_for_status()
             
-            for line in response.iter_lines():
-                if line:
-                    line = line.decode('utf-8')
-                    if line.startswith('data: '):
-                        data_str = line[6:]
-                        if data_str == '[DONE]':
-                            break
-                        try:
-                            import json
-                            data = json.loads(data_str)
-                            delta = data['choices'][0]['delta']
-                            if 'content' in delta:
-                                yield delta['content']
-                        except json.JSONDecodeError:
-                            continue
+            # Tokens are buffered so each yield (and WSGI write) carries
+            # several of them
+            buffer = []
+            buffered = 0
+            last_flush = time.monotonic()
+            
+            # Lines stay bytes: both JSON parsers accept them, so there is no
+            # per-token decode; chunk_size=None yields data as it arrives
+            for line in response.iter_lines(chunk_size=None):
+                if not line.startswith(b'data: '):
+                    continue
+                payload = line[6:]
+                if payload == b'[DONE]':
+                    break
+                try:
+                    data = _json_loads(payload)
+                except json.JSONDecodeError:
+                    continue
+                content = data['choices'][0].get('delta', {}).get('content')
+                if not content:
+                    continue
+                buffer.append(content)
+                buffered += len(content)
+                now = time.monotonic()
+                if buffered >= chunk_chars or now - last_flush >= flush_interval:
+                    yield ''.join(buffer)
+                    buffer.clear()
+                    buffered = 0
+                    last_flush = now
+            
+            if buffer:
+                yield ''.join(buffer)
                             
         except Exception as e:
             logger.error(f"Error streaming from LM Studio: {str(e)}")
@@ -224,17 +274,18 @@ class LMStudioProvider(AIProvider):
         model_name = model or self.default_model
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f'{self.api_url}/embeddings',
-                json={
+                data=_json_dumps({
                     'model': model_name,
                     'input': text
-                },
+                }),
+                headers=JSON_HEADERS,
                 timeout=self.timeout
             )
             
             response.raise_for_status()
-            data = response.json()
+            data = _json_loads(response.content)
             
             return data['data'][0]['embedding']
             
@@ -242,27 +293,43 @@ class LMStudioProvider(AIProvider):
             logger.error(f"Error getting embeddings from LM Studio: {str(e)}")
             raise APIError(f"Embeddings error: {str(e)}", status_code=500)
     
-    def is_available(self) -> bool:
+    def _fetch_models(self) -> List[str]:
         """
-        Check if LM Studio is available and has a model loaded
-        
+        Get the ids of the loaded models, reusing a listing fetched within
+        the last MODELS_CACHE_TTL seconds
+
         Returns:
-            True if LM Studio is running and ready, False otherwise
+            List of model names (empty if LM Studio is unreachable)
         """
+        now = time.monotonic()
+        fetched_at, models = self._models_cache
+        if models is not None and now - fetched_at < MODELS_CACHE_TTL:
+            return models
+
         try:
-            response = requests.get(
+            response = self.session.get(
                 f'{self.api_url}/models',
                 timeout=5
             )
-            if response.status_code == 200:
-                data = response.json()
-                # Check if any models are loaded
-                models = data.get('data', [])
-                return len(models) > 0
-            return False
+            if response.status_code != 200:
+                return []
+            data = _json_loads(response.content)
+            models = [model['id'] for model in data.get('data', [])]
         except Exception as e:
             logger.debug(f"LM Studio not available: {str(e)}")
-            return False
+            return []
+
+        self._models_cache = (now, models)
+        return models
+
+    def is_available(self) -> bool:
+        """
+        Check if LM Studio is available and has a model loaded
+        
+        Returns:
+            True if LM Studio is running and ready, False otherwise
+        """
+        return bool(self._fetch_models())
     
     def get_models(self) -> List[str]:
         """
@@ -280,18 +347,7 @@ class LMStudioProvider(AIProvider):
         Returns:
             List of model names
         """
-        try:
-            response = requests.get(
-                f'{self.api_url}/models',
-                timeout=5
-            )
-            if response.status_code == 200:
-                data = response.json()
-                return [model['id'] for model in data.get('data', [])]
-            return []
-        except Exception as e:
-            logger.error(f"Error getting models from LM Studio: {str(e)}")
-            return []
+        return list(self._fetch_models())
     
     def get_info(self) -> Dict[str, Any]:
         """
@@ -5,7 +5,7 @@ Implementation for Ollama local AI service
 import requests
 import logging
 from typing import Dict, Any, Optional
-from .base import AIProvider
+from .base import AIProvider, create_http_session
 from src.utils.errors import APIError
 
 logger = logging.getLogger(__name__)
@@ -25,6 +25,7 @@ class OllamaProvider(AIProvider):
         self.api_url = config.get('api_url', 'http://localhost:11434')
         self.default_model = config.get('default_model', 'phi3')
         self.timeout = config.get('timeout', 30)
+        self.session = create_http_session()
     
     def chat(self, prompt: str, model: Optional[str] = None, **kwargs) -> Dict[str, Any]:
         """
@@ -45,7 +46,7 @@ class OllamaProvider(AIProvider):
         timeout = kwargs.get('timeout', self.timeout)
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f'{self.api_url}/api/generate',
                 json={
                     'model': model_name,
@@ -99,7 +100,7 @@ class OllamaProvider(AIProvider):
         timeout = kwargs.get('timeout', self.timeout)
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f'{self.api_url}/api/generate',
                 json={
                     'model': model_name,
@@ -131,7 +132,7 @@ class OllamaProvider(AIProvider):
             True if available, False otherwise
         """
         try:
-            response = requests.get(f'{self.api_url}/api/tags', timeout=5)
+            response = self.session.get(f'{self.api_url}/api/tags', timeout=5)
             return response.status_code == 200
         except Exception as e:
             return False
@@ -145,7 +146,7 @@ class OllamaProvider(AIProvider):
             List of model names
         """
         try:
-            response = requests.get(f'{self.api_url}/api/tags', timeout=5)
+            response = self.session.get(f'{self.api_url}/api/tags', timeout=5)
             response.raise_for_status()
             data = response.json()
             return [model['name'] for model in data.get('models', [])]
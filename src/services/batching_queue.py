@@ -0,0 +1,128 @@
+"""
+Batching Queue
+Background worker that collects queued items for a short interval and
+writes them in one transaction, so request handlers can hand off
+bookkeeping writes instead of committing them on the request path
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, List
+
+from src.models.models import db
+
+logger = logging.getLogger(__name__)
+
+
+class BatchingQueue:
+    """
+    Queue drained by a daemon thread in batches
+
+    Items are gathered for up to `interval` seconds after the first one
+    arrives, then passed to flush_fn(items) inside an app context. The
+    session is committed afterwards; a failed batch is rolled back and
+    retried item by item, logging the items that still fail.
+    Pending items are flushed synchronously at interpreter exit.
+    """
+
+    def __init__(self, name: str, flush_fn: Callable[[List[Any]], None], interval: float = 1.0):
+        """
+        Args:
+            name: Worker thread name, also used in error logs
+            flush_fn: Writes a batch of items using db.session
+            interval: Seconds to keep collecting after the first item
+        """
+        self.name = name
+        self.flush_fn = flush_fn
+        self.interval = interval
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._app = None
+        atexit.register(self.drain)
+
+    def put(self, app, item):
+        """Schedule an item to be written by the background worker"""
+        self._app = app
+        self._queue.put(item)
+        self._ensure_worker()
+
+    def drain(self):
+        """Synchronously flush any pending items (used on shutdown)"""
+        items = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._flush(items)
+        for _ in items:
+            self._queue.task_done()
+
+    def _ensure_worker(self):
+        """Start the background worker thread if it is not running yet"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name=self.name, daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self, first_item):
+        """Gather items arriving within interval of the first one"""
+        items = [first_item]
+        deadline = time.monotonic() + self.interval
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _flush(self, items):
+        """
+        Write a batch in one transaction
+
+        If the batch fails (e.g. one item violates a constraint), the items
+        are retried one per transaction so only the bad ones are dropped.
+        """
+        if not items or self._app is None:
+            return
+
+        with self._app.app_context():
+            try:
+                if self._write(items):
+                    return
+                logger.warning(f'{self.name}: batch of {len(items)} failed, retrying items one by one')
+                for item in items:
+                    self._write([item])
+            finally:
+                db.session.remove()
+
+    def _write(self, items):
+        """Run flush_fn on items and commit; returns False (rolled back) on error"""
+        try:
+            self.flush_fn(items)
+            db.session.commit()
+            return True
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f'{self.name}: failed to flush {len(items)} items: {str(e)}')
+            return False
+
+    def _run(self):
+        """Worker loop: block for the next item, then flush a coalesced batch"""
+        while True:
+            item = self._queue.get()
+            items = self._collect(item)
+            self._flush(items)
+            for _ in items:
+                self._queue.task_done()
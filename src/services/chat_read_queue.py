@@ -0,0 +1,46 @@
+"""
+Chat Read Queue
+Coalesces "last read" timestamps from the chat message list endpoint into
+batched background UPDATEs, so reading a chat no longer commits a write on
+the request path
+"""
+
+from sqlalchemy import bindparam
+
+from src.models.models import db
+from src.models.chat_models import ChatParticipant
+from src.services.batching_queue import BatchingQueue
+
+# How long the worker keeps collecting before issuing a batched UPDATE
+FLUSH_INTERVAL = 1.0
+
+
+def record_read(app, chat_id, user_id, read_at):
+    """Schedule a participant's last_read_at to be set to read_at"""
+    _queue.put(app, (chat_id, user_id, read_at))
+
+
+def _flush(items):
+    """Apply a batch of queued reads as one executemany UPDATE"""
+    # Keep only the latest read time per participant
+    latest = {}
+    for chat_id, user_id, read_at in items:
+        key = (chat_id, user_id)
+        if key not in latest or read_at > latest[key]:
+            latest[key] = read_at
+
+    participants = ChatParticipant.__table__
+    statement = participants.update().where(
+        participants.c.chat_id == bindparam('p_chat_id')
+    ).where(
+        participants.c.user_id == bindparam('p_user_id')
+    ).values(
+        last_read_at=bindparam('read_at')
+    )
+    db.session.execute(statement, [
+        {'p_chat_id': chat_id, 'p_user_id': user_id, 'read_at': read_at}
+        for (chat_id, user_id), read_at in latest.items()
+    ])
+
+
+_queue = BatchingQueue('chat-read-queue', _flush, FLUSH_INTERVAL)
@@ -2,9 +2,13 @@
 Document Parser Service
 Unified interface for parsing various document formats
 """
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+import hashlib
 import os
 import logging
+import threading
 from .pdf_parser import PDFParser
 from .word_parser import WordParser
 from .excel_parser import ExcelParser
@@ -12,6 +16,12 @@ from .powerpoint_parser import PowerPointParser
 
 logger = logging.getLogger(__name__)
 
+# Number of (doc_hash, max_length) AI contexts kept in memory
+AI_CONTEXT_CACHE_SIZE = 256
+
+# Leading characters of the text that feed into doc_hash
+DOC_HASH_TEXT_LENGTH = 65536
+
 
 class DocumentParserService:
     """
@@ -19,8 +29,11 @@ class DocumentParserService:
     Automatically detects file type and uses appropriate parser
     """
     
+    _ai_context_cache: 'OrderedDict[Tuple[str, int], str]' = OrderedDict()
+    _ai_context_lock = threading.Lock()
+    
     # Supported file extensions and their parsers
-    PARSERS = {
+    PARSERS: Dict[str, type] = {
         '.pdf': PDFParser,
         '.docx': WordParser,
         '.doc': WordParser,  # Note: python-docx only supports .docx
@@ -71,6 +84,7 @@ class DocumentParserService:
             
             if parsed_data.get('success'):
                 parsed_data['summary'] = parser_class.get_summary(parsed_data)
+                parsed_data['doc_hash'] = cls.compute_doc_hash(parsed_data)
             
             return parsed_data
             
@@ -83,12 +97,44 @@ class DocumentParserService:
                 'file_type': file_type or 'unknown'
             }
     
+    @classmethod
+    def parse_documents(cls, file_paths: List[str], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Parse several documents concurrently
+        
+        Args:
+            file_paths: Paths to the document files
+            max_workers: Maximum number of documents parsed at once
+            
+        Returns:
+            List of parse_document() results, in the same order as file_paths
+        """
+        if len(file_paths) <= 1:
+            return [cls.parse_document(path) for path in file_paths]
+        
+        with ThreadPoolExecutor(max_workers=max_workers or min(len(file_paths), os.cpu_count() or 1)) as executor:
+            return list(executor.map(cls.parse_document, file_paths))
+    
+    @staticmethod
+    def compute_doc_hash(parsed_data: Dict[str, Any]) -> str:
+        """Fingerprint the parts of a parsed document that shape its AI context"""
+        text: str = parsed_data.get('text', '')
+        digest = hashlib.sha1()
+        digest.update(str(len(text)).encode())
+        digest.update((parsed_data.get('summary') or '').encode())
+        digest.update(repr(sorted((parsed_data.get('metadata') or {}).items())).encode())
+        digest.update(text[:DOC_HASH_TEXT_LENGTH].encode())
+        return digest.hexdigest()
+    
     @classmethod
     def get_ai_context(cls, parsed_data: Dict[str, Any], max_length: int = 8000) -> str:
         """
         Generate AI-friendly context from parsed document
         Truncates content if too long to fit in AI context window
         
+        Results are cached by (doc_hash, max_length) so repeated requests
+        for the same document reuse the formatted context.
+        
         Args:
             parsed_data: Output from parse_document()
             max_length: Maximum character length for AI context
@@ -96,10 +142,32 @@ class DocumentParserService:
         Returns:
             Formatted string suitable for AI context
         """
+        doc_hash = parsed_data.get('doc_hash')
+        if not doc_hash:
+            return cls._build_ai_context(parsed_data, max_length)
+        
+        key = (doc_hash, max_length)
+        with cls._ai_context_lock:
+            if key in cls._ai_context_cache:
+                cls._ai_context_cache.move_to_end(key)
+                return cls._ai_context_cache[key]
+        
+        context = cls._build_ai_context(parsed_data, max_length)
+        
+        with cls._ai_context_lock:
+            cls._ai_context_cache[key] = context
+            if len(cls._ai_context_cache) > AI_CONTEXT_CACHE_SIZE:
+                cls._ai_context_cache.popitem(last=False)
+        
+        return context
+    
+    @classmethod
+    def _build_ai_context(cls, parsed_data: Dict[str, Any], max_length: int) -> str:
+        """Format parsed document content for use as AI context"""
         if not parsed_data.get('success'):
             return f"Document parsing failed: {parsed_data.get('error', 'Unknown error')}"
         
-        context_parts = []
+        context_parts: List[str] = []
         
         # Add document summary
         if parsed_data.get('summary'):
@@ -108,21 +176,23 @@ class DocumentParserService:
             context_parts.append("")
         
         # Add metadata
-        metadata = parsed_data.get('metadata', {})
+        metadata: Dict[str, Any] = parsed_data.get('metadata', {})
         if metadata:
             context_parts.append("=== METADATA ===")
             for key, value in metadata.items():
-                if value and key not in ['sheet_width', 'slide_width', 'slide_height']:
+                if value and key not in ('sheet_width', 'slide_width', 'slide_height'):
                     context_parts.append(f"{key.replace('_', ' ').title()}: {value}")
             context_parts.append("")
         
         # Add main content
-        text = parsed_data.get('text', '')
+        text: str = parsed_data.get('text', '')
         if text:
             context_parts.append("=== CONTENT ===")
             
-            # Truncate if necessary
-            remaining_length = max_length - len('\n'.join(context_parts))
+            # Truncate if necessary - header length is summed rather than
+            # joined so the parts are only concatenated once
+            header_length = sum(len(part) for part in context_parts) + len(context_parts) - 1
+            remaining_length = max(max_length - header_length, 0)
             if len(text) > remaining_length:
                 text = text[:remaining_length] + "\n\n... (content truncated)"
             
@@ -144,7 +214,7 @@ class DocumentParserService:
         return file_extension.lower() in cls.PARSERS
     
     @classmethod
-    def get_supported_types(cls) -> list:
+    def get_supported_types(cls) -> List[str]:
         """
         Get list of supported file types
         
@@ -96,14 +96,13 @@ class ExcelParser:
                 
                 # Add sheet content to text
                 if sheet_data['rows']:
-                    sheet_text = f"\n[Sheet: {sheet_name}]\n"
-                    for row in sheet_data['rows'][:50]:  # Limit text output
-                        sheet_text += ' | '.join(row) + '\n'
+                    sheet_lines = [f"\n[Sheet: {sheet_name}]"]
+                    sheet_lines.extend(' | '.join(row) for row in sheet_data['rows'][:50])  # Limit text output
                     
                     if len(sheet_data['rows']) > 50:
-                        sheet_text += f"... ({len(sheet_data['rows']) - 50} more rows)\n"
+                        sheet_lines.append(f"... ({len(sheet_data['rows']) - 50} more rows)")
                     
-                    all_text.append(sheet_text)
+                    all_text.append('\n'.join(sheet_lines) + '\n')
             
             # Combine all text
             result['text'] = '\n'.join(all_text)
@@ -3,11 +3,83 @@ PDF Document Parser
 Extracts text, metadata, and structure from PDF files
 """
 import PyPDF2
-from typing import Dict, List, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Tuple
 import logging
+import multiprocessing
+import os
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Documents up to this many pages are extracted in-process; handing pages
+# to worker processes costs more than it saves on short files
+PARALLEL_PAGE_THRESHOLD = 4
+
+# Pages handed to each worker per task
+PAGES_PER_CHUNK = 8
+
+# Workers are started from a clean server process (or spawned) rather than
+# forked from this heavily threaded one, where a fork can copy locks held
+# by other threads and deadlock the child
+_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Lazily create the shared process pool used for page extraction"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=os.cpu_count(),
+                    mp_context=multiprocessing.get_context(_START_METHOD)
+                )
+    return _executor
+
+
+def _extract_pages(pdf_reader, start: int, end: int) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Extract text from pages [start, end) of an open PDF
+    
+    Returns:
+        (page dicts in order, whether any of the pages has images)
+    """
+    pages = []
+    has_images = False
+    for page_num in range(start + 1, end + 1):
+        try:
+            page = pdf_reader.pages[page_num - 1]
+            page_text = page.extract_text()
+            pages.append({
+                'page_number': page_num,
+                'text': page_text,
+                'char_count': len(page_text)
+            })
+            
+            # Check for images (basic detection)
+            if '/XObject' in page.get('/Resources', {}):
+                has_images = True
+                
+        except Exception as e:
+            logger.warning(f"Error extracting text from page {page_num}: {e}")
+            pages.append({
+                'page_number': page_num,
+                'text': '',
+                'error': str(e)
+            })
+    return pages, has_images
+
+
+def _extract_page_range(args: Tuple[str, int, int]) -> Tuple[List[Dict[str, Any]], bool]:
+    """Process-pool entry point: open the PDF independently and extract a page range"""
+    file_path, start, end = args
+    with open(file_path, 'rb') as file:
+        return _extract_pages(PyPDF2.PdfReader(file), start, end)
+
 
 class PDFParser:
     """Parser for PDF documents"""
@@ -57,28 +129,18 @@ class PDFParser:
                     }
                 
                 # Extract text from each page
-                all_text = []
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    try:
-                        page_text = page.extract_text()
-                        result['pages'].append({
-                            'page_number': page_num,
-                            'text': page_text,
-                            'char_count': len(page_text)
-                        })
-                        all_text.append(page_text)
-                        
-                        # Check for images (basic detection)
-                        if '/XObject' in page.get('/Resources', {}):
-                            result['has_images'] = True
-                            
-                    except Exception as e:
-                        logger.warning(f"Error extracting text from page {page_num}: {e}")
-                        result['pages'].append({
-                            'page_number': page_num,
-                            'text': '',
-                            'error': str(e)
-                        })
+                page_count = result['page_count']
+                if page_count <= PARALLEL_PAGE_THRESHOLD:
+                    chunks = [_extract_pages(pdf_reader, 0, page_count)]
+                else:
+                    chunks = PDFParser._extract_parallel(file_path, page_count)
+                    if chunks is None:
+                        chunks = [_extract_pages(pdf_reader, 0, page_count)]
+                
+                for pages, has_images in chunks:
+                    result['pages'].extend(pages)
+                    result['has_images'] = result['has_images'] or has_images
+                all_text = [page['text'] for page in result['pages'] if 'error' not in page]
                 
                 # Combine all text
                 result['text'] = '\n\n'.join(all_text)
@@ -103,6 +165,25 @@ class PDFParser:
                 'page_count': 0
             }
     
+    @staticmethod
+    def _extract_parallel(file_path: str, page_count: int):
+        """
+        Extract page ranges across the process pool, in page order
+        
+        Returns:
+            List of (pages, has_images) chunks, or None if the pool is
+            unavailable and the caller should extract serially
+        """
+        ranges = [
+            (file_path, start, min(start + PAGES_PER_CHUNK, page_count))
+            for start in range(0, page_count, PAGES_PER_CHUNK)
+        ]
+        try:
+            return list(_get_executor().map(_extract_page_range, ranges))
+        except Exception as e:
+            logger.warning(f"Parallel PDF extraction failed, falling back to serial: {e}")
+            return None
+    
     @staticmethod
     def get_summary(parsed_data: Dict[str, Any]) -> str:
         """
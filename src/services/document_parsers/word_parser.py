@@ -54,14 +54,16 @@ class WordParser:
             }
             
             # Extract paragraphs
-            all_text = []
+            all_text: List[str] = []
             for para in doc.paragraphs:
-                if para.text.strip():
+                # Paragraph.text re-walks the XML runs on every access
+                para_text = para.text
+                if para_text.strip():
                     result['paragraphs'].append({
-                        'text': para.text,
+                        'text': para_text,
                         'style': para.style.name if para.style else 'Normal'
                     })
-                    all_text.append(para.text)
+                    all_text.append(para_text)
             
             # Extract tables
             for table_idx, table in enumerate(doc.tables, 1):
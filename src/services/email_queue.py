@@ -0,0 +1,55 @@
+"""
+Email Queue
+Sends outgoing emails from background worker threads so HTTP requests
+don't wait on SMTP, retrying transient SMTP failures with backoff
+"""
+
+import logging
+import os
+import smtplib
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Retries after the first attempt, and the delay before the first retry
+# (doubled on every further retry)
+EMAIL_MAX_RETRIES = 3
+EMAIL_RETRY_BACKOFF = 2.0
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('EMAIL_WORKERS', 8)),
+    thread_name_prefix='email'
+)
+
+
+def queue_email(send: Callable, *args, **kwargs) -> Future:
+    """
+    Run send(*args, **kwargs) in the background
+
+    send should raise smtplib.SMTPException (or OSError for connection
+    problems) on failure; those are retried up to EMAIL_MAX_RETRIES times.
+
+    Returns:
+        Future resolving to True once sent, or False if every attempt failed
+    """
+    return _executor.submit(_send_with_retry, send, args, kwargs)
+
+
+def _send_with_retry(send, args, kwargs):
+    """Call send, retrying SMTP and connection errors with exponential backoff"""
+    for attempt in range(EMAIL_MAX_RETRIES + 1):
+        try:
+            send(*args, **kwargs)
+            return True
+        except (smtplib.SMTPException, OSError) as e:
+            if attempt == EMAIL_MAX_RETRIES:
+                logger.error(f'Giving up sending email after {attempt + 1} attempts: {str(e)}')
+                return False
+            delay = EMAIL_RETRY_BACKOFF * (2 ** attempt)
+            logger.warning(f'Email send failed ({str(e)}), retrying in {delay:.0f}s')
+            time.sleep(delay)
+        except Exception as e:
+            logger.error(f'Error sending email: {str(e)}')
+            return False
@@ -0,0 +1,35 @@
+"""
+Email Read Queue
+Coalesces "mark as read" writes from the email detail endpoint into
+batched background UPDATEs so opening an email stays a read-only request
+"""
+
+from collections import defaultdict
+
+from src.models.models import Email
+from src.services.batching_queue import BatchingQueue
+
+# How long the worker keeps collecting before issuing a batched UPDATE
+FLUSH_INTERVAL = 0.1
+
+
+def enqueue_mark_read(app, email_id, user_id):
+    """Schedule an email to be marked as read by the background worker"""
+    _queue.put(app, (email_id, user_id))
+
+
+def _flush(items):
+    """Apply a batch of queued read-marks, one UPDATE per user"""
+    ids_by_user = defaultdict(set)
+    for email_id, user_id in items:
+        ids_by_user[user_id].add(email_id)
+
+    for user_id, email_ids in ids_by_user.items():
+        Email.query.filter(
+            Email.user_id == user_id,
+            Email.id.in_(email_ids),
+            Email.read.is_(False)
+        ).update({'read': True}, synchronize_session=False)
+
+
+_queue = BatchingQueue('email-read-queue', _flush, FLUSH_INTERVAL)
@@ -0,0 +1,43 @@
+"""
+File Access Queue
+Coalesces download counts and last-accessed timestamps from the file
+serving endpoints into batched background UPDATEs, so serving a file no
+longer commits a write on the request path
+"""
+
+from sqlalchemy import bindparam
+
+from src.models.models import db, File
+from src.services.batching_queue import BatchingQueue
+
+# How long the worker keeps collecting before issuing a batched UPDATE
+FLUSH_INTERVAL = 1.0
+
+
+def record_access(app, file_id, accessed_at, download=False):
+    """Schedule a file access (and optionally a download) to be recorded"""
+    _queue.put(app, (file_id, accessed_at, 1 if download else 0))
+
+
+def _flush(items):
+    """Apply a batch of queued accesses as one executemany UPDATE"""
+    # Sum downloads and keep the latest access time per file
+    totals = {}
+    for file_id, accessed_at, downloads in items:
+        count, last = totals.get(file_id, (0, accessed_at))
+        totals[file_id] = (count + downloads, max(last, accessed_at))
+
+    files = File.__table__
+    statement = files.update().where(
+        files.c.id == bindparam('file_id')
+    ).values(
+        download_count=files.c.download_count + bindparam('downloads'),
+        last_accessed=bindparam('accessed_at')
+    )
+    db.session.execute(statement, [
+        {'file_id': file_id, 'downloads': count, 'accessed_at': last}
+        for file_id, (count, last) in totals.items()
+    ])
+
+
+_queue = BatchingQueue('file-access-queue', _flush, FLUSH_INTERVAL)
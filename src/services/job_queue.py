@@ -0,0 +1,132 @@
+"""
+Background Job Queue
+Runs slow work (document parsing, LLM calls) off the request thread and
+keeps results in memory so clients can poll for them
+
+Jobs and their results live in this process only. A poll must reach the
+worker process that accepted the job: run the app as a single process
+(threads for concurrency) or pin clients to one worker, otherwise a poll
+routed elsewhere gets 404 for a job that is still running. Jobs are also
+lost when the process restarts.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from flask import jsonify
+
+from src.utils.errors import APIError
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs are kept for this long before being discarded
+JOB_TTL = 3600
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('BACKGROUND_WORKERS', 4)),
+    thread_name_prefix='background-job'
+)
+_jobs: Dict[str, Dict[str, Any]] = {}
+_jobs_lock = threading.Lock()
+
+
+def submit_job(app, user_id: int, func: Callable, *args, **kwargs) -> str:
+    """
+    Run func(*args, **kwargs) in the background inside an app context
+
+    Args:
+        app: Flask application used to push a context for the job
+        user_id: Owner of the job; only they can read its result
+        func: Callable to execute
+
+    Returns:
+        Job id to poll with get_job()
+    """
+    def run():
+        with app.app_context():
+            return func(*args, **kwargs)
+
+    job_id = uuid.uuid4().hex
+    with _jobs_lock:
+        _prune_expired()
+        _jobs[job_id] = {
+            'user_id': user_id,
+            'future': _executor.submit(run),
+            'created_at': time.time()
+        }
+    return job_id
+
+
+def get_job(job_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Get the state of a job owned by user_id
+
+    Returns:
+        None if the job does not exist (or belongs to another user),
+        otherwise a dict with 'status' ('pending', 'completed' or 'failed')
+        plus 'result' or 'error'
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+
+    if not job or job['user_id'] != user_id:
+        return None
+
+    future = job['future']
+    if not future.done():
+        return {'status': 'pending'}
+
+    error = future.exception()
+    if error is not None:
+        return {'status': 'failed', 'error': error}
+    return {'status': 'completed', 'result': future.result()}
+
+
+def job_result_response(job_id: str, user_id: int):
+    """
+    Build the HTTP response for polling a job
+
+    Returns:
+        (response, status) - 202 while the job is running, 200 with the
+        job's result merged in once it completed. Only jobs submitted in
+        this process are found (see the module docstring).
+
+    Raises:
+        APIError: 404 for unknown jobs, or the job's own error if it failed
+    """
+    job = get_job(job_id, user_id)
+
+    if job is None:
+        raise APIError('Task not found', 404)
+
+    if job['status'] == 'pending':
+        return jsonify({'task_id': job_id, 'status': 'pending'}), 202
+
+    if job['status'] == 'failed':
+        error = job['error']
+        if isinstance(error, APIError):
+            raise error
+        logger.error(f'Background task {job_id} failed: {error}')
+        raise APIError(f'Task failed: {str(error)}', 500)
+
+    return jsonify({
+        'task_id': job_id,
+        'status': 'completed',
+        **job['result']
+    }), 200
+
+
+def _prune_expired():
+    """Drop finished jobs older than JOB_TTL (caller holds _jobs_lock)"""
+    cutoff = time.time() - JOB_TTL
+    expired = [
+        job_id for job_id, job in _jobs.items()
+        if job['created_at'] < cutoff and job['future'].done()
+    ]
+    for job_id in expired:
+        del _jobs[job_id]
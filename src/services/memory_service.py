@@ -7,7 +7,7 @@ import uuid
 import json
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
-from sqlalchemy import desc
+from sqlalchemy import desc, func
 
 from src.models.models import db, ConversationHistory, UserMemory, ContextSummary, Task
 
@@ -136,7 +136,10 @@ class MemoryService:
     def get_all_memories(self, user_id: int) -> Dict[str, List[Dict]]:
         """Get all memories organized by type"""
         memories = UserMemory.query.filter_by(user_id=user_id).all()
-        
+        return self._organize_memories(memories)
+    
+    def _organize_memories(self, memories: List[UserMemory]) -> Dict[str, List[Dict]]:
+        """Group loaded memories by type"""
         organized = {
             'preferences': [],
             'patterns': [],
@@ -343,4 +346,36 @@ class MemoryService:
             'total_summaries': total_summaries,
             'memory_by_type': memory_by_type
         }
+    
+    def export_user_data(self, user_id: int, history_limit: int = 1000) -> Dict:
+        """
+        Collect memories, recent conversation history and statistics for an
+        export in three queries - memory statistics are derived from the
+        loaded memories instead of being counted separately
+        """
+        memories = UserMemory.query.filter_by(user_id=user_id).all()
+        history = self.get_recent_conversations(user_id, history_limit)
+        
+        total_conversations, total_summaries = db.session.query(
+            db.session.query(func.count(ConversationHistory.id))
+                .filter(ConversationHistory.user_id == user_id).scalar_subquery(),
+            db.session.query(func.count(ContextSummary.id))
+                .filter(ContextSummary.user_id == user_id).scalar_subquery()
+        ).one()
+        
+        memory_by_type = {
+            memory_type: sum(1 for memory in memories if memory.memory_type == memory_type)
+            for memory_type in ['preference', 'pattern', 'insight', 'goal']
+        }
+        
+        return {
+            'memories': self._organize_memories(memories),
+            'conversation_history': history,
+            'statistics': {
+                'total_conversations': total_conversations,
+                'total_memories': len(memories),
+                'total_summaries': total_summaries,
+                'memory_by_type': memory_by_type
+            }
+        }
 
@@ -0,0 +1,73 @@
+"""
+Response Cache
+Short-lived in-process cache for read-mostly JSON endpoints (team
+dashboards), so repeated requests within the TTL skip the SQL aggregates
+and the JSON encoding
+"""
+
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, request
+
+logger = logging.getLogger(__name__)
+
+# Keys of the cached team endpoints
+TEAM_STATS_KEY = 'team:stats'
+TEAM_ROLES_KEY = 'team:roles'
+TEAM_ONLINE_KEY = 'team:online'
+TEAM_KEYS = (TEAM_STATS_KEY, TEAM_ROLES_KEY, TEAM_ONLINE_KEY)
+
+# Upper bound on cached responses; entries are per query string, which
+# clients control, so the oldest are dropped beyond this
+MAX_ENTRIES = 256
+
+_entries = {}
+_lock = threading.Lock()
+
+
+def cached(key, ttl=30):
+    """
+    Cache a view's successful JSON response under key for ttl seconds
+
+    The view must return (response, status) like the other routes; only
+    200 responses are cached. Entries are per query string, but not per
+    user, so only use this for responses that are the same for every caller.
+    """
+    def decorator(f):
+        """Decorator wrapper that applies response caching"""
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            """Inner function that serves from or fills the cache"""
+            entry_key = (key, request.query_string)
+            now = time.monotonic()
+            with _lock:
+                entry = _entries.get(entry_key)
+            if entry and entry[0] > now:
+                return current_app.response_class(entry[1], mimetype='application/json'), 200
+
+            response, status = f(*args, **kwargs)
+            if status == 200:
+                with _lock:
+                    _evict(now)
+                    _entries[entry_key] = (now + ttl, response.get_data())
+            return response, status
+        return decorated
+    return decorator
+
+
+def _evict(now):
+    """Drop expired entries, then the oldest ones while at MAX_ENTRIES (caller holds _lock)"""
+    for entry_key in [k for k, entry in _entries.items() if entry[0] <= now]:
+        del _entries[entry_key]
+    while len(_entries) >= MAX_ENTRIES:
+        del _entries[next(iter(_entries))]
+
+
+def invalidate(*keys):
+    """Drop cached responses, e.g. after a write they depend on"""
+    with _lock:
+        for entry_key in [k for k in _entries if k[0] in keys]:
+            del _entries[entry_key]
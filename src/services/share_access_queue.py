@@ -0,0 +1,45 @@
+"""
+Share Access Queue
+Counts visits to shared task links in memory and writes them as batched
+background UPDATEs, so the public share endpoint doesn't commit a write on
+every request
+"""
+
+from sqlalchemy import bindparam, func
+
+from src.models.models import db, TaskShare
+from src.services.batching_queue import BatchingQueue
+
+# How long the worker keeps collecting before issuing a batched UPDATE
+FLUSH_INTERVAL = 1.0
+
+
+def record_access(app, share_id, accessed_at):
+    """Schedule a visit to be added to a share's access_count"""
+    _queue.put(app, (share_id, accessed_at))
+
+
+def _flush(items):
+    """Apply a batch of visits as one executemany UPDATE"""
+    # Sum the visits and keep the latest visit time per share
+    hits = {}
+    latest = {}
+    for share_id, accessed_at in items:
+        hits[share_id] = hits.get(share_id, 0) + 1
+        if share_id not in latest or accessed_at > latest[share_id]:
+            latest[share_id] = accessed_at
+
+    shares = TaskShare.__table__
+    statement = shares.update().where(
+        shares.c.id == bindparam('p_share_id')
+    ).values(
+        access_count=func.coalesce(shares.c.access_count, 0) + bindparam('hits'),
+        last_accessed=bindparam('accessed_at')
+    )
+    db.session.execute(statement, [
+        {'p_share_id': share_id, 'hits': count, 'accessed_at': latest[share_id]}
+        for share_id, count in hits.items()
+    ])
+
+
+_queue = BatchingQueue('share-access-queue', _flush, FLUSH_INTERVAL)
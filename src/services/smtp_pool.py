@@ -0,0 +1,152 @@
+"""
+SMTP Connection Pool
+Keeps authenticated SMTP sessions open and reuses them across emails, so
+each message costs only the DATA exchange instead of a fresh TCP connect,
+STARTTLS handshake and login
+"""
+
+import logging
+import os
+import queue
+import smtplib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Open sessions per SMTP account, i.e. how many sends run in parallel. Keep
+# it within the provider's concurrent connection limit (e.g. Gmail allows
+# 15, Zoho 5-10)
+SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', 5))
+
+# Sessions are closed and replaced after this many messages
+SMTP_MAX_MESSAGES_PER_CONNECTION = 100
+
+# Seconds to wait for a free session when all of them are in use
+SMTP_POOL_TIMEOUT = 30
+
+_pools: Dict[Tuple[str, int, str], 'SMTPPool'] = {}
+_pools_lock = threading.Lock()
+
+
+class SMTPPoolTimeout(smtplib.SMTPException):
+    """No pooled session became free within SMTP_POOL_TIMEOUT"""
+
+
+class _PooledConnection:
+    """An SMTP session plus the number of messages sent over it"""
+
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.sent = 0
+
+
+class SMTPPool:
+    """Pool of logged-in SMTP sessions for one server/account"""
+
+    def __init__(self, host, port, username, password,
+                 size=SMTP_POOL_SIZE, max_messages=SMTP_MAX_MESSAGES_PER_CONNECTION):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.max_messages = max_messages
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a healthy session
+
+        A session that raises while borrowed is closed rather than returned
+        to the pool.
+        """
+        conn = self._acquire()
+        try:
+            yield conn.smtp
+        except Exception:
+            self._discard(conn)
+            raise
+        conn.sent += 1
+        self._release(conn)
+
+    def _acquire(self):
+        """Take an idle session (checking it is alive) or open a new one"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+
+            if conn is None:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        return _PooledConnection(self._connect())
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                try:
+                    conn = self._idle.get(timeout=SMTP_POOL_TIMEOUT)
+                except queue.Empty:
+                    # An SMTPException, so the email queue retries the send
+                    raise SMTPPoolTimeout(
+                        f'No SMTP session free for {self.host} after {SMTP_POOL_TIMEOUT}s'
+                    ) from None
+
+            if self._is_alive(conn):
+                return conn
+            self._discard(conn)
+
+    def _release(self, conn):
+        """Return a session to the pool, recycling it after max_messages"""
+        if conn.sent >= self.max_messages:
+            self._discard(conn)
+        else:
+            self._idle.put(conn)
+
+    def _discard(self, conn):
+        """Close a session and free its slot"""
+        try:
+            conn.smtp.quit()
+        except Exception:
+            conn.smtp.close()
+        with self._lock:
+            self._created -= 1
+
+    def _connect(self):
+        """Open, secure and authenticate a new SMTP session"""
+        smtp = smtplib.SMTP(self.host, self.port)
+        try:
+            smtp.starttls()
+            smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        return smtp
+
+    @staticmethod
+    def _is_alive(conn):
+        """Cheap NOOP health check for a session that sat idle in the pool"""
+        try:
+            return conn.smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+
+def get_smtp_pool(host, port, username, password) -> SMTPPool:
+    """Get the shared pool for an SMTP server and account"""
+    key = (host, port, username)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool.password != password:
+            pool = _pools[key] = SMTPPool(host, port, username, password)
+        return pool
@@ -0,0 +1,38 @@
+"""
+JSON provider backed by orjson
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson  # optional, much faster JSON encoding/decoding
+except ImportError:
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes and decodes with orjson
+
+    Output matches the default provider: keys are sorted and datetimes,
+    dates, decimals and UUIDs go through the same fallback (so datetimes
+    are still HTTP dates).
+    """
+
+    def dumps(self, obj, **kwargs):
+        """Serialize obj to a JSON string"""
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode()
+
+    def loads(self, s, **kwargs):
+        """Deserialize a JSON string or bytes"""
+        return orjson.loads(s)
+
+
+def init_json_provider(app):
+    """Use orjson for the app's JSON responses when it is installed"""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
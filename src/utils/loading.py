@@ -0,0 +1,16 @@
+"""
+Relationship loading helpers
+"""
+from flask import current_app
+from sqlalchemy.orm import raiseload
+
+
+def loader_options(*options):
+    """
+    Eager-load options for a query, plus raiseload('*') when STRICT_LOADING
+    is enabled so any relationship that was not loaded up front raises
+    instead of silently issuing a lazy query per row
+    """
+    if current_app.config.get('STRICT_LOADING'):
+        return options + (raiseload('*'),)
+    return options
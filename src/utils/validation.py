@@ -4,8 +4,17 @@ Input validation utilities
 from marshmallow import Schema, fields, validate, ValidationError
 from functools import wraps
 from flask import request, jsonify
+import re
+import threading
 import bleach
 
+# Characters bleach would strip, escape or normalize. Text without any of
+# them comes back from bleach.clean(tags=[], strip=True) unchanged
+_NEEDS_SANITIZING = re.compile(r'[<>&\x00-\x08\x0b-\x1f]')
+
+# bleach Cleaners keep parser state, so each thread gets its own
+_cleaners = threading.local()
+
 
 def sanitize_string(text):
     """
@@ -13,19 +22,30 @@ def sanitize_string(text):
     """
     if not text:
         return text
-    return bleach.clean(str(text), tags=[], strip=True)
+    text = str(text)
+    if not _NEEDS_SANITIZING.search(text):
+        return text
+    
+    cleaner = getattr(_cleaners, 'cleaner', None)
+    if cleaner is None:
+        cleaner = _cleaners.cleaner = bleach.sanitizer.Cleaner(tags=[], strip=True)
+    return cleaner.clean(text)
 
 
 def validate_request(schema_class):
     """
     Decorator to validate request data against a marshmallow schema
+    
+    Accepts a schema class or instance; the schema is built once when the
+    route is decorated and reused for every request.
     """
+    schema = schema_class() if isinstance(schema_class, type) else schema_class
+    
     def decorator(f):
         """Decorator wrapper that applies schema validation"""
         @wraps(f)
         def decorated(*args, **kwargs):
             """Inner function that validates request data"""
-            schema = schema_class()
             try:
                 validated_data = schema.load(request.json or {})
                 request.validated_data = validated_data
@@ -84,6 +104,7 @@ class AIPromptSchema(Schema):
         error_messages={'required': 'Message is required'}
     )
     context = fields.Str(validate=validate.Length(max=10000))
+    background = fields.Bool()
 
 
 class FileSchema(Schema):
@@ -4,6 +4,7 @@ Pytest configuration and fixtures
 import pytest
 import sys
 import os
+from sqlalchemy import event
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
@@ -29,6 +30,19 @@ def client(app):
     return app.test_client()
 
 
+@pytest.fixture
+def query_counter(app):
+    """Collect the SQL statements executed while the test runs"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(_db.engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(_db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
 @pytest.fixture(scope='function')
 def db(app):
     """Create database for testing"""
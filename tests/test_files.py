@@ -0,0 +1,48 @@
+"""
+File upload endpoint tests
+"""
+import io
+import uuid
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from src.routes import files
+
+
+@pytest.mark.integration
+class TestUploadMimeDetection:
+    """Small uploads are sniffed from their own bytes only"""
+
+    @pytest.fixture
+    def upload_folder(self, tmp_path, monkeypatch):
+        """Store uploads in a temporary directory"""
+        monkeypatch.setattr(files, 'UPLOAD_FOLDER', str(tmp_path))
+        return tmp_path
+
+    def test_save_upload_head_is_file_content(self, upload_folder):
+        """A file under MIME_SNIFF_LENGTH comes back as its exact bytes"""
+        content = b'hello world\n'
+        upload = FileStorage(stream=io.BytesIO(content), filename='notes')
+
+        file_size, _, head = files.save_upload(upload, str(upload_folder / 'notes'))
+
+        assert file_size == len(content)
+        assert head == content
+        assert files.detect_mime_type(head, '') == 'text/plain'
+
+    def test_upload_small_file_mime_type(self, client, upload_folder):
+        """Uploading a small text file stores the sniffed text type"""
+        client.post('/api/auth/register', json={
+            'name': 'File Owner',
+            'email': f'file_owner_{uuid.uuid4().hex[:8]}@example.com',
+            'password': 'FilePassword123!',
+            'role': 'Developer'
+        })
+
+        response = client.post('/api/files/upload', data={
+            'file': (io.BytesIO(b'name: alex\nrole: backend\n'), 'config.yml')
+        }, content_type='multipart/form-data')
+
+        assert response.status_code == 201
+        assert response.get_json()['file']['mime_type'] == 'text/plain'
@@ -0,0 +1,91 @@
+"""
+Task instance API endpoint tests
+"""
+import pytest
+
+from src.models.models import db as _db, User, File
+from src.models.task_instance import TaskInstance, SubTask, TaskFile, TaskAILog, TaskCollaborator
+
+
+def _seed_task(owner_id, file_count, subtask_count):
+    """Create a task with files, subtasks, AI logs and collaborators"""
+    members = [
+        User(name=f'Member {i}', email=f'member{i}_{owner_id}@example.com', role='Developer')
+        for i in range(3)
+    ]
+    for member in members:
+        member.set_password('MemberPassword123!')
+    _db.session.add_all(members)
+    _db.session.flush()
+
+    task = TaskInstance(
+        title='Export Task',
+        owner_id=owner_id,
+        supervisor_id=members[0].id,
+        assignee_id=members[1].id
+    )
+    _db.session.add(task)
+    _db.session.flush()
+
+    for i in range(file_count):
+        file = File(
+            filename=f'file{i}.txt',
+            original_filename=f'file{i}.txt',
+            file_path=f'file{i}.txt',
+            file_size=100,
+            mime_type='text/plain',
+            uploaded_by=owner_id
+        )
+        _db.session.add(file)
+        _db.session.flush()
+        _db.session.add(TaskFile(task_id=task.id, file_id=file.id, uploaded_by=members[i % 3].id))
+
+    for i in range(subtask_count):
+        _db.session.add(SubTask(
+            parent_task_id=task.id,
+            title=f'Subtask {i}',
+            assignee_id=members[i % 3].id,
+            created_by=owner_id
+        ))
+        _db.session.add(TaskAILog(
+            task_id=task.id,
+            user_id=members[i % 3].id,
+            user_message='Question',
+            ai_response='Answer'
+        ))
+
+    for member in members:
+        _db.session.add(TaskCollaborator(task_id=task.id, user_id=member.id, added_by=owner_id))
+
+    _db.session.commit()
+    return task.id
+
+
+@pytest.mark.integration
+class TestTaskInstanceExport:
+    """Test the task export endpoint"""
+
+    def test_export_loads_relationships_in_bounded_queries(self, app, client, query_counter):
+        """Export eager-loads everything it serializes (no lazy loads, no N+1)"""
+        response = client.post('/api/auth/register', json={
+            'name': 'Export Owner',
+            'email': 'export_owner@example.com',
+            'password': 'ExportPassword123!',
+            'role': 'Developer'
+        })
+        owner_id = response.get_json()['user']['id']
+        task_id = _seed_task(owner_id, file_count=50, subtask_count=10)
+        _db.session.remove()
+
+        query_counter.clear()
+        response = client.get(f'/api/task-instances/{task_id}/export')
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert len(data['files']) == 50
+        assert len(data['subtasks']) == 10
+        assert len(data['ai_logs']) == 10
+        assert len(data['collaborators']) == 3
+        assert data['files'][0]['file']['filename'].startswith('file')
+        assert data['subtasks'][0]['assignee'] is not None
+        assert len(query_counter) <= 5
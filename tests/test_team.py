@@ -0,0 +1,78 @@
+"""
+Team and task list endpoint query-count tests
+"""
+import uuid
+
+import pytest
+
+from src.models.models import db as _db, User, Task
+
+
+def _seed_tasks(owner_id, task_count):
+    """Create members and tasks assigned to / supervised by them"""
+    members = [
+        User(name=f'Team Member {i}', email=f'team_member{i}_{owner_id}@example.com', role='Developer')
+        for i in range(3)
+    ]
+    for member in members:
+        member.set_password('MemberPassword123!')
+    _db.session.add_all(members)
+    _db.session.flush()
+
+    for i in range(task_count):
+        _db.session.add(Task(
+            title=f'Team Task {i}',
+            status='todo',
+            assignee_id=owner_id,
+            supervisor_id=members[i % 3].id
+        ))
+
+    _db.session.commit()
+
+
+@pytest.mark.integration
+class TestListQueryCounts:
+    """List endpoints run a bounded number of queries, however many rows"""
+
+    @pytest.fixture
+    def owner_id(self, client):
+        """Register a user with 20 tasks and log the client in as them"""
+        response = client.post('/api/auth/register', json={
+            'name': 'Team Owner',
+            'email': f'team_owner_{uuid.uuid4().hex[:8]}@example.com',
+            'password': 'TeamPassword123!',
+            'role': 'Developer'
+        })
+        owner_id = response.get_json()['user']['id']
+        _seed_tasks(owner_id, task_count=20)
+        _db.session.remove()
+        return owner_id
+
+    def test_member_tasks(self, client, owner_id, query_counter):
+        """Member task list: one query for the member, one for the tasks"""
+        query_counter.clear()
+        response = client.get(f'/api/team/members/{owner_id}/tasks')
+
+        assert response.status_code == 200
+        assert response.get_json()['total'] == 20
+        assert len(query_counter) <= 2
+
+    def test_team_members(self, client, owner_id, query_counter):
+        """Team member list is a single query"""
+        query_counter.clear()
+        response = client.get('/api/team/members')
+
+        assert response.status_code == 200
+        assert response.get_json()['total'] >= 4
+        assert len(query_counter) <= 2
+
+    def test_tasks_with_relations(self, client, owner_id, query_counter):
+        """Task list loads assignee and supervisor with the tasks"""
+        query_counter.clear()
+        response = client.get(f'/api/tasks?assignee_id={owner_id}&per_page=50')
+
+        assert response.status_code == 200
+        tasks = response.get_json()['tasks']
+        assert len(tasks) == 20
+        assert all(task['assignee'] and task['supervisor'] for task in tasks)
+        assert len(query_counter) <= 2